@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-import os, dj_database_url
+import os, sys, dj_database_url
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -24,6 +24,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = config('SECRET_KEY')
 DEBUG = config('DEBUG', default=True, cast=bool)
+# manage.py test: see the test overrides below
+TESTING = sys.argv[1:2] == ['test']
 
 # SECURITY WARNING: don't run with debug turned on in production!
 ALLOWED_HOSTS = ["*"]
@@ -38,7 +40,6 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'rest_framework',
     'widget_tweaks',
     'core'
 ]
@@ -52,12 +53,13 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.routers.PrimaryStickinessMiddleware',
 
 ]
 
 STORAGES = {
     "default": {
-        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "BACKEND": "core.storage.ContentAddressedStorage",
     },
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
@@ -72,19 +74,42 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compiled templates are kept per process (and reset by the
+            # autoreloader under runserver); cabrelblog/wsgi.py compiles
+            # core's templates when a worker boots
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
+# Render the hot partials (like button, post cards) with Jinja2, from
+# core/jinja2/. Needs the Jinja2 package; benchmark with
+# `manage.py benchmark_templates`.
+JINJA2_PARTIALS = config('JINJA2_PARTIALS', default=False, cast=bool)
+if JINJA2_PARTIALS:
+    TEMPLATES.append({
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {'environment': 'core.jinja_env.environment'},
+    })
+
 WSGI_APPLICATION = 'cabrelblog.wsgi.application'
 
+# Worker boot (django.setup() + URLconf import) budget, checked by core.tests and profile_startup
+BOOT_TIME_BUDGET_MS = config('BOOT_TIME_BUDGET_MS', default=1500, cast=int)
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -97,6 +122,22 @@ DATABASES = {
     }
 }
 
+# Optional read replica, e.g. sqlite:////path/to/replica_db. Views wrapped
+# with core.routers.replica_reads read from it; everything else, and every
+# write, uses the primary.
+REPLICA_DATABASE_URL = config('REPLICA_DATABASE_URL', default='')
+if REPLICA_DATABASE_URL:
+    DATABASES['replica'] = dj_database_url.parse(REPLICA_DATABASE_URL)
+elif TESTING:
+    # Tests always get a replica: a test database of its own that stays
+    # empty unless something writes to it, so routing can be checked
+    DATABASES['replica'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'replica_db'}
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# After a write, a client reads from the primary for this many seconds
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+
 
 # DATABASES = {
 #     'default': dj_database_url.parse(config('DATABASE_URL'))
@@ -141,6 +182,8 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static', BASE_DIR / 'assets']
+# Gzipped size a page's inlined critical CSS may reach, checked by core.tests and build_critical_css
+CRITICAL_CSS_BUDGET_BYTES = config('CRITICAL_CSS_BUDGET_BYTES', default=4608, cast=int)
 
 
 # Media Configuration
@@ -148,6 +191,125 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploaded media is served by core.media.serve. Content-hashed names are cached
+# for a year; anything else is revalidated after MEDIA_MAX_AGE seconds.
+MEDIA_MAX_AGE = config('MEDIA_MAX_AGE', default=3600, cast=int)
+MEDIA_PRECOMPRESS = config('MEDIA_PRECOMPRESS', default=True, cast=bool)
+MEDIA_PRECOMPRESS_EXTENSIONS = ('.svg',)
+# Set to an nginx internal location (e.g. '/protected-media/') to offload transfers
+MEDIA_ACCEL_REDIRECT = config('MEDIA_ACCEL_REDIRECT', default='')
+# Unreferenced media blobs younger than this are kept by collect_media_garbage
+MEDIA_BLOB_GRACE_HOURS = config('MEDIA_BLOB_GRACE_HOURS', default=24, cast=int)
+
+
+# Sessions
+# "cached_db" reads sessions from the cache and only falls back to the
+# django_session table on a miss; "signed_cookies" keeps them out of the
+# database entirely. Flash messages always live in a cookie so showing one
+# never writes a session, and anonymous visitors without a session cookie
+# never hit the session store.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[config('SESSION_BACKEND', default='cached_db')]
+SESSION_SAVE_EVERY_REQUEST = False
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+
+# Rate limits for write endpoints, per signed-in user or client IP ("<count>/<s|m|h|d>")
+RATELIMIT_ENABLE = config('RATELIMIT_ENABLE', default=True, cast=bool)
+RATELIMIT_TRUST_X_FORWARDED_FOR = config('RATELIMIT_TRUST_X_FORWARDED_FOR', default=False, cast=bool)
+# Proxies in front of the app that append to X-Forwarded-For; the client is the
+# entry the outermost one added, since anything left of it is the client's own
+RATELIMIT_TRUSTED_PROXIES = config('RATELIMIT_TRUSTED_PROXIES', default=1, cast=int)
+RATELIMITS = {
+    'like': config('RATELIMIT_LIKE', default='30/m'),
+    'comment': config('RATELIMIT_COMMENT', default='10/m'),
+    'contact': config('RATELIMIT_CONTACT', default='5/h'),
+    'register': config('RATELIMIT_REGISTER', default='5/h'),
+}
+
+# Replayed submissions of post, comment and contact forms (see core.idempotency)
+IDEMPOTENCY_TTL = config('IDEMPOTENCY_TTL', default=24 * 60 * 60, cast=int)
+IDEMPOTENCY_WAIT = config('IDEMPOTENCY_WAIT', default=5, cast=float)  # seconds a duplicate waits for the original
+
+
+# Generated documents (feeds, sitemaps) cached on disk between requests
+CACHE_ROOT = Path(config('CACHE_ROOT', default=str(BASE_DIR / 'cache')))
+
+# One cache for every worker on the host (a SQLite database in WAL mode, see
+# core.cache_backends), so entries and invalidation generations set by one
+# gunicorn worker reach the others. SHARED_CACHE=False falls back to the
+# per-process LocMemCache.
+SHARED_CACHE = config('SHARED_CACHE', default=True, cast=bool)
+if SHARED_CACHE:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache_backends.SQLiteCache',
+            'LOCATION': str(CACHE_ROOT / 'shared_cache.sqlite3'),
+            'OPTIONS': {'MAX_ENTRIES': config('SHARED_CACHE_MAX_ENTRIES', default=100000, cast=int)},
+        }
+    }
+# Tests clear the cache freely, so they never touch the live shared one
+if TESTING:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Stampede protection (core.caching.get_or_compute): how long one request
+# may hold a recompute lock, and how long an expired entry may still be
+# served while it is being recomputed
+STAMPEDE_LOCK_TIMEOUT = config('STAMPEDE_LOCK_TIMEOUT', default=10, cast=int)
+STAMPEDE_STALE_SECONDS = config('STAMPEDE_STALE_SECONDS', default=300, cast=int)
+# Post listings are also refreshed when a Post changes
+LISTING_CACHE_TIMEOUT = config('LISTING_CACHE_TIMEOUT', default=300, cast=int)
+# Portfolio stats on the About page are also refreshed when a Portfolio changes
+ABOUT_STATS_TIMEOUT = config('ABOUT_STATS_TIMEOUT', default=600, cast=int)
+# Prebuilt fragments (core.fragments) are replaced when their generation is
+# bumped; the timeout only bounds how long superseded ones stay in the cache
+FRAGMENT_CACHE_TIMEOUT = config('FRAGMENT_CACHE_TIMEOUT', default=86400, cast=int)
+
+# Scheme and host of the absolute links in feeds and sitemaps (and the one cached copy of
+# each document), whatever Host header a request came with
+SITE_URL = config('SITE_URL', default='http://localhost:8000')
+
+# Syndication feeds
+FEED_ITEMS_LIMIT = config('FEED_ITEMS_LIMIT', default=100, cast=int)  # 0 = every post
+FEED_MAX_AGE = config('FEED_MAX_AGE', default=300, cast=int)
+
+# Sitemaps (the sitemaps.org protocol allows at most 50,000 URLs per file)
+SITEMAP_SHARD_SIZE = config('SITEMAP_SHARD_SIZE', default=50000, cast=int)
+SITEMAP_MAX_AGE = config('SITEMAP_MAX_AGE', default=3600, cast=int)
+
+# GraphQL API (core.graphql_api)
+GRAPHQL_PAGE_SIZE = 20
+GRAPHQL_MAX_PAGE_SIZE = config('GRAPHQL_MAX_PAGE_SIZE', default=100, cast=int)
+GRAPHQL_MAX_DEPTH = config('GRAPHQL_MAX_DEPTH', default=8, cast=int)
+GRAPHQL_MAX_COMPLEXITY = config('GRAPHQL_MAX_COMPLEXITY', default=10000, cast=int)  # fields an operation may resolve
+GRAPHQL_LIST_SIZE_ESTIMATE = 10  # assumed length of unpaginated lists (tags, comments) when costing a query
+GRAPHQL_PERSISTED_QUERY_TTL = config('GRAPHQL_PERSISTED_QUERY_TTL', default=7 * 24 * 60 * 60, cast=int)
+
+# View counts are buffered per worker and written back in one UPDATE
+VIEW_COUNT_FLUSH_INTERVAL = config('VIEW_COUNT_FLUSH_INTERVAL', default=30, cast=int)  # seconds
+VIEW_COUNT_FLUSH_THRESHOLD = config('VIEW_COUNT_FLUSH_THRESHOLD', default=500, cast=int)  # buffered views
+TRENDING_HALF_LIFE_HOURS = config('TRENDING_HALF_LIFE_HOURS', default=24, cast=float)
+TRENDING_SIZE = config('TRENDING_SIZE', default=3, cast=int)
+
+# Each user's liked post ids are cached for like buttons on listing pages
+# (core.likes), unless they have liked more posts than this
+LIKED_IDS_CACHE_LIMIT = config('LIKED_IDS_CACHE_LIMIT', default=10000, cast=int)
+LIKED_IDS_CACHE_TIMEOUT = config('LIKED_IDS_CACHE_TIMEOUT', default=86400, cast=int)
+
+# Contact messages scoring at least CONTACT_SPAM_THRESHOLD are filed as spam on arrival
+CONTACT_SPAM_THRESHOLD = config('CONTACT_SPAM_THRESHOLD', default=4, cast=int)
+CONTACT_SPAM_WINDOW_HOURS = config('CONTACT_SPAM_WINDOW_HOURS', default=24, cast=int)
+CONTACT_SPAM_MAX_LINKS = config('CONTACT_SPAM_MAX_LINKS', default=3, cast=int)
+CONTACT_ARCHIVE_RETENTION_DAYS = config('CONTACT_ARCHIVE_RETENTION_DAYS', default=90, cast=int)
+
+# Rows fetched per query by the streaming exports (core.exports)
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
 
 
 # Default primary key field type
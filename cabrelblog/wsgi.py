@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cabrelblog.settings')
 
 application = get_wsgi_application()
+
+# Compile templates at worker boot rather than on the first requests
+from core.templating import warm_templates  # noqa: E402
+
+warm_templates()
@@ -1,5 +1,18 @@
-from django.contrib import admin
-from .models import Category, Portfolio, Post, Tag, Comment, Like, Service, ContactMessage
+from datetime import timedelta
+
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.db import models
+from django.db.models import Case, Max, Min, Value, When
+from django.template.response import TemplateResponse
+from django.utils import timezone
+
+from .models import Category, Portfolio, Post, PostQuerySet, Tag, Comment, Like, Service, ContactMessage, invalidate_posts
+from .caching import bump_generation
+from .counters import rebuild_trending
+from .exports import EXPORTS, export_response
+from .fragments import SERVICES_NAMESPACE
+from .moderation import set_status
  
 
 
@@ -8,15 +21,206 @@ from .models import Category, Portfolio, Post, Tag, Comment, Like, Service, Cont
 class ServiceAdmin(admin.ModelAdmin):
     list_display = ('title', 'order')
     ordering = ('order',)
+    actions = ['reorder_services']
+
+    @admin.action(description='Reorder selected services')
+    def reorder_services(self, request, queryset):
+        services = list(queryset.order_by('order', 'pk'))
+        if 'apply' not in request.POST:
+            return TemplateResponse(request, 'admin/core/service/reorder.html', {
+                **self.admin_site.each_context(request),
+                'opts': self.model._meta,
+                'services': services,
+                'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+            })
+
+        by_pk = {str(service.pk): service for service in services}
+        ordered = [by_pk[pk] for pk in request.POST.get('order', '').split(',') if pk in by_pk]
+        if len(ordered) != len(services):
+            self.message_user(request, 'The new order did not match the selected services.', messages.ERROR)
+            return None
+        # Reuse the selection's own positions so unselected services keep their place
+        slots = sorted(service.order for service in services)
+        assignments = list(zip(ordered, slots))
+        if len(set(slots)) < len(slots):
+            # Shared positions cannot be reused: renumber every service, the
+            # selection taking the places it held in the full list
+            selected = iter(ordered)
+            everything = [next(selected) if str(service.pk) in by_pk else service
+                          for service in queryset.model.objects.order_by('order', 'pk')]
+            assignments = [(service, slot) for slot, service in enumerate(everything)]
+        # One UPDATE for the whole list; it bypasses save(), so invalidate once here
+        queryset.model.objects.filter(pk__in=[service.pk for service, _ in assignments]).update(order=Case(
+            *[When(pk=service.pk, then=Value(slot)) for service, slot in assignments],
+            output_field=models.PositiveIntegerField(),
+        ))
+        bump_generation(SERVICES_NAMESPACE)
+        self.message_user(request, f'{len(ordered)} service(s) reordered.')
+
+
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    search_fields = ['name']
+    ordering = ['name']
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    search_fields = ['name']
+    ordering = ['name']
+
+
+# Blog section
+#
+# These tables grow without bound, so the changelists avoid per-row queries
+# (list_select_related), never COUNT the whole table (show_full_result_count)
+# and never render every row of a related table into a <select>.
 
+def _next_period(moment, kind):
+    if kind == 'year':
+        return moment.replace(year=moment.year + 1)
+    if kind == 'month':
+        return moment.replace(year=moment.year + moment.month // 12, month=moment.month % 12 + 1)
+    return moment + timedelta(days=1)
 
 
+class IndexedDatesQuerySet(models.QuerySet):
+    def aggregate(self, *args, **kwargs):
+        # SQLite answers a lone MIN() or MAX() from an index but scans the
+        # table for both at once, which is what the date hierarchy asks for
+        if not args and len(kwargs) > 1 and all(isinstance(value, (Min, Max)) for value in kwargs.values()):
+            result = {}
+            for name, aggregate in kwargs.items():
+                result.update(super().aggregate(**{name: aggregate}))
+            return result
+        return super().aggregate(*args, **kwargs)
 
-admin.site.register(Category)
-admin.site.register(Tag)
-admin.site.register(Post)
-admin.site.register(Comment)
-admin.site.register(Like)
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None, is_dst=None):
+        """
+        The date hierarchy's choices, found with MIN/MAX and one EXISTS per
+        period. Every query is a range seek on the indexed column, where the
+        default SELECT DISTINCT of a truncated date scans the whole table.
+        """
+        if kind not in ('year', 'month', 'day'):
+            return super().datetimes(field_name, kind, order, tzinfo)
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if bounds['first'] is None:
+            return []
+        first, last = (timezone.localtime(value, tzinfo) for value in (bounds['first'], bounds['last']))
+
+        periods = []
+        start = first.replace(
+            month=1 if kind == 'year' else first.month,
+            day=1 if kind in ('year', 'month') else first.day,
+            hour=0, minute=0, second=0, microsecond=0,
+        )
+        while start <= last:
+            end = _next_period(start, kind)
+            if self.filter(**{f'{field_name}__gte': start, f'{field_name}__lt': end}).exists():
+                periods.append(start)
+            start = end
+        return periods[::-1] if order == 'DESC' else periods
+
+
+class ExportActionsMixin:
+    """Actions that stream the selected rows as CSV or JSON Lines, optionally gzipped (see core.exports)"""
+    export_name = None
+
+    def _export(self, queryset, fmt, compress):
+        _, fields = EXPORTS[self.export_name]
+        filename = f'{self.export_name}-{timezone.now():%Y%m%d-%H%M%S}'
+        return export_response(queryset, fields, filename, fmt, compress)
+
+    @admin.action(description='Export selected as CSV', permissions=['view'])
+    def export_csv(self, request, queryset):
+        return self._export(queryset, 'csv', False)
+
+    @admin.action(description='Export selected as CSV (gzip)', permissions=['view'])
+    def export_csv_gzip(self, request, queryset):
+        return self._export(queryset, 'csv', True)
+
+    @admin.action(description='Export selected as JSON Lines', permissions=['view'])
+    def export_jsonl(self, request, queryset):
+        return self._export(queryset, 'jsonl', False)
+
+    @admin.action(description='Export selected as JSON Lines (gzip)', permissions=['view'])
+    def export_jsonl_gzip(self, request, queryset):
+        return self._export(queryset, 'jsonl', True)
+
+
+EXPORT_ACTIONS = ['export_csv', 'export_csv_gzip', 'export_jsonl', 'export_jsonl_gzip']
+
+
+class IndexedDateHierarchyMixin:
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return IndexedDatesQuerySet(model=queryset.model, query=queryset.query, using=queryset._db)
+
+
+@admin.register(Post)
+class PostAdmin(ExportActionsMixin, IndexedDateHierarchyMixin, admin.ModelAdmin):
+    list_display = ['title', 'author', 'created_at', 'view_count']
+    list_select_related = ['author']
+    show_full_result_count = False
+    search_fields = ['title']
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
+    raw_id_fields = ['author']
+    autocomplete_fields = ['category', 'tags']
+    actions = ['render_content', 'reset_view_counts', *EXPORT_ACTIONS]
+    export_name = 'posts'
+
+    def get_queryset(self, request):
+        # The changelist never shows the Markdown or its rendered HTML
+        queryset = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name.endswith('changelist'):
+            queryset = queryset.defer(*PostQuerySet.BODY_FIELDS)
+        return queryset
+
+    @admin.action(description='Re-render Markdown for selected posts')
+    def render_content(self, request, queryset):
+        from .rendering import RENDERED_POST_FIELDS, render_post_fields
+        posts = []
+        for pk, content in queryset.order_by().values_list('pk', 'content').iterator(chunk_size=500):
+            posts.append(Post(pk=pk, **render_post_fields(content)))
+        Post.objects.bulk_update(posts, RENDERED_POST_FIELDS, batch_size=500)
+        invalidate_posts()
+        self.message_user(request, f'{len(posts)} post(s) re-rendered.')
+
+    @admin.action(description='Reset view counts of selected posts')
+    def reset_view_counts(self, request, queryset):
+        updated = queryset.update(view_count=0, trending_score=None)
+        rebuild_trending()
+        self.message_user(request, f'{updated} post(s) reset.')
+
+
+@admin.register(Comment)
+class CommentAdmin(IndexedDateHierarchyMixin, admin.ModelAdmin):
+    list_display = ['author', 'post', 'created_at']
+    list_select_related = ['author', 'post']
+    show_full_result_count = False
+    search_fields = ['content']
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
+    raw_id_fields = ['post', 'author']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer(*(f'post__{field}' for field in PostQuerySet.BODY_FIELDS))
+
+
+@admin.register(Like)
+class LikeAdmin(IndexedDateHierarchyMixin, admin.ModelAdmin):
+    list_display = ['user', 'post', 'created_at']
+    list_select_related = ['user', 'post']
+    show_full_result_count = False
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
+    raw_id_fields = ['post', 'user']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer(*(f'post__{field}' for field in PostQuerySet.BODY_FIELDS))
 
 
 
@@ -61,13 +265,16 @@ class PortfolioAdmin(admin.ModelAdmin):
 
     # Contact section
 @admin.register(ContactMessage)
-class ContactMessageAdmin(admin.ModelAdmin):
-    list_display = ['name', 'email', 'subject', 'status', 'created_at']
+class ContactMessageAdmin(ExportActionsMixin, admin.ModelAdmin):
+    list_display = ['name', 'email', 'subject', 'status', 'spam_score', 'created_at']
     list_filter = ['status', 'created_at']
-    list_editable = ['status']
     search_fields = ['name', 'email', 'subject', 'message']
     ordering = ['-created_at']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'spam_score']
+    show_full_result_count = False
+    # Status changes go through the bulk actions (one UPDATE) rather than list_editable (one save per row)
+    actions = ['mark_read', 'mark_replied', 'mark_archived', 'mark_spam', *EXPORT_ACTIONS]
+    export_name = 'contact'
     
     fieldsets = (
         ('Contact Information', {
@@ -84,4 +291,24 @@ class ContactMessageAdmin(admin.ModelAdmin):
     
     def has_delete_permission(self, request, obj=None):
         # Only allow superusers to delete messages
-        return request.user.is_superuser
\ No newline at end of file
+        return request.user.is_superuser
+
+    def _set_status(self, request, queryset, status):
+        updated = set_status(queryset, status)
+        self.message_user(request, f'{updated} message(s) marked as {status}.')
+
+    @admin.action(description='Mark selected messages as read')
+    def mark_read(self, request, queryset):
+        self._set_status(request, queryset, 'read')
+
+    @admin.action(description='Mark selected messages as replied')
+    def mark_replied(self, request, queryset):
+        self._set_status(request, queryset, 'replied')
+
+    @admin.action(description='Archive selected messages')
+    def mark_archived(self, request, queryset):
+        self._set_status(request, queryset, 'archived')
+
+    @admin.action(description='Mark selected messages as spam')
+    def mark_spam(self, request, queryset):
+        self._set_status(request, queryset, 'spam')
@@ -0,0 +1,194 @@
+import logging
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds a writer waits for another process's write to finish
+BUSY_TIMEOUT = 5
+# Map the database into memory so hot reads are served from the page cache without read() calls
+MMAP_SIZE = 256 * 1024 * 1024
+# One write in this many also clears expired entries and culls
+CULL_EVERY = 500
+
+
+class _NoRows:
+    """Stands in for the cursor of a statement that could not run"""
+    rowcount = 0
+
+    def fetchone(self):
+        return None
+
+    def __iter__(self):
+        return iter(())
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache in one SQLite database in WAL mode, shared by every worker process
+    on the host, so entries, locks and invalidation generations set in one
+    gunicorn worker are seen by all of them.
+
+    In WAL mode readers never wait for writers (and take no lock another
+    process could hold), and every operation is a single statement, so add()
+    and incr() are atomic across processes. Integers are stored as SQLite
+    integers so incr() happens inside the database; everything else is
+    pickled.
+
+    A database still locked after BUSY_TIMEOUT is treated as a miss, or a
+    set() or delete() that did not happen, rather than failing the request.
+    add() and incr() raise instead: callers rely on their result for locks,
+    counters and invalidation generations.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = Path(location)
+        self._local = threading.local()
+
+    def _connection(self):
+        # One connection per thread, never inherited across a fork
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = self._connect()
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _connect(self):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self._path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        # Losing the last writes on a power cut is fine for a cache
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL) WITHOUT ROWID'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)')
+        return connection
+
+    def _execute(self, sql, params=(), many=False, fail_silently=True):
+        try:
+            connection = self._connection()
+            return connection.executemany(sql, params) if many else connection.execute(sql, params)
+        except sqlite3.OperationalError as exc:
+            if not fail_silently:
+                raise
+            logger.warning('Cache statement skipped: %s', exc)
+            return _NoRows()
+
+    @staticmethod
+    def _encode(value):
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _decode(value):
+        return value if type(value) is int else pickle.loads(value)
+
+    def _write(self, sql, params, fail_silently=True):
+        cursor = self._execute(sql, params, fail_silently=fail_silently)
+        if random.randrange(CULL_EVERY) == 0:
+            self._cull()
+        return cursor
+
+    def _cull(self):
+        self._execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        count = self._execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count > self._max_entries:
+            # Entries closest to expiring go first; entries without an expiry last
+            self._execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency if self._cull_frequency else count,),
+            )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        cursor = self._write(
+            'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            (key, self._encode(value), self.get_backend_timeout(timeout), now),
+            fail_silently=False,
+        )
+        return cursor.rowcount == 1
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._execute(
+            'SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, time.time()),
+        ).fetchone()
+        return default if row is None else self._decode(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._write(
+            'INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)',
+            (key, self._encode(value), self.get_backend_timeout(timeout)),
+        )
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._execute(
+            'UPDATE cache SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._execute('DELETE FROM cache WHERE key = ?', (key,)).rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._execute(
+            'SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, time.time()),
+        ).fetchone() is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._execute(
+            "UPDATE cache SET value = value + ? WHERE key = ? AND typeof(value) = 'integer' "
+            'AND (expires IS NULL OR expires > ?) RETURNING value',
+            (delta, key, time.time()),
+            fail_silently=False,
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Key '{key}' not found")
+        return row[0]
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not keys:
+            return {}
+        placeholders = ', '.join('?' * len(keys))
+        rows = self._execute(
+            f'SELECT key, value FROM cache WHERE key IN ({placeholders}) AND (expires IS NULL OR expires > ?)',
+            (*keys, time.time()),
+        )
+        return {keys[key]: self._decode(value) for key, value in rows}
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [(self.make_and_validate_key(key, version=version), self._encode(value), expires) for key, value in data.items()]
+        self._execute('INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)', rows, many=True)
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if keys:
+            self._execute(f'DELETE FROM cache WHERE key IN ({", ".join("?" * len(keys))})', keys)
+
+    def clear(self):
+        self._execute('DELETE FROM cache')
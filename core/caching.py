@@ -0,0 +1,172 @@
+import math
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .routers import primary_reads
+
+
+# Generation counters
+#
+# Cached documents (feeds, sitemaps, rendered fragments) embed a generation
+# number in their key. Bumping the generation from a model signal makes every
+# previously cached document unreachable without having to know its key.
+
+def _generation_key(namespace):
+    return f'generation:{namespace}'
+
+
+def _new_generation():
+    # Seed from the clock so a flushed cache never hands out a generation that
+    # was already used for documents still sitting on disk.
+    return time.time_ns() // 1000
+
+
+def get_generation(namespace):
+    """Return the current generation number for a cache namespace"""
+    key = _generation_key(namespace)
+    generation = cache.get(key)
+    if generation is None:
+        generation = _new_generation()
+        if not cache.add(key, generation, None):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def bump_generation(namespace):
+    """Invalidate everything cached under a namespace (from signals: see bump_generation_on_commit)"""
+    key = _generation_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Never read yet (or evicted); add() so a concurrent bump is not overwritten
+        generation = _new_generation()
+        if cache.add(key, generation, None):
+            return generation
+        return cache.incr(key)
+
+
+def bump_generation_on_commit(namespace, using=None):
+    """
+    Bump once the current transaction commits. Bumped earlier, another
+    worker could recompute from the old snapshot and store it under the
+    new generation.
+    """
+    transaction.on_commit(lambda: bump_generation(namespace), using=using)
+
+
+# Stampede protection
+#
+# When a popular entry expires, or its namespace generation is bumped by a
+# model signal, only one request recomputes it: the one that takes the
+# cache.add lock. The others keep serving the previous value, or wait for
+# the new one when there is none. Entries with a timeout are also refreshed
+# a little ahead of expiry, with a probability that grows as expiry nears
+# and with the cost of the last computation (XFetch), so most refreshes
+# happen before anyone sees a miss.
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+@contextmanager
+def single_flight(key):
+    """Yield True in the one caller holding the recompute lock for key"""
+    lock_key = f'lock:{key}'
+    acquired = cache.add(lock_key, 1, settings.STAMPEDE_LOCK_TIMEOUT)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(lock_key)
+
+
+def wait_for(check):
+    """Poll check() until it returns something other than None, for at most STAMPEDE_LOCK_TIMEOUT"""
+    deadline = time.monotonic() + settings.STAMPEDE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        result = check()
+        if result is not None:
+            return result
+        time.sleep(LOCK_POLL_INTERVAL)
+    return None
+
+
+# Entries are (value, generation, computed_at, expires_at, cost)
+
+def _is_fresh(entry, generation, beta):
+    _, entry_generation, _, expires_at, cost = entry
+    if entry_generation != generation:
+        return False
+    if expires_at is None:
+        return True
+    return time.time() - cost * beta * math.log(1 - random.random()) < expires_at
+
+
+def _recomputed(key, seen, generation):
+    """The entry under key if it was computed for generation after seen was read, else None"""
+    latest = cache.get(key)
+    if latest is None or latest[1] != generation or (seen is not None and latest[2] == seen[2]):
+        return None
+    return latest
+
+
+def _compute_and_store(key, compute, timeout, generation):
+    started = time.monotonic()
+    # Shared entries are never filled from a replica that may lag behind
+    with primary_reads():
+        value = compute()
+    cost = time.monotonic() - started
+    now = time.time()
+    expires_at = now + timeout if timeout else None
+    # Kept past its expiry so it can be served stale while it is recomputed
+    cache_timeout = timeout + settings.STAMPEDE_STALE_SECONDS if timeout else None
+    cache.set(key, (value, generation, now, expires_at, cost), cache_timeout)
+    return value
+
+
+def get_or_compute(key, compute, timeout=None, namespace=None, beta=1.0):
+    """
+    Return compute() cached under key, for timeout seconds and/or until the
+    namespace generation changes, recomputing it in one request at a time.
+    """
+    generation = get_generation(namespace) if namespace else None
+    entry = cache.get(key)
+    if entry is not None and _is_fresh(entry, generation, beta):
+        return entry[0]
+
+    with single_flight(key) as leader:
+        if leader:
+            # Another request may have finished recomputing between our read and the lock
+            latest = _recomputed(key, entry, generation)
+            if latest is not None:
+                return latest[0]
+            return _compute_and_store(key, compute, timeout, generation)
+
+    if entry is not None:
+        return entry[0]
+    latest = wait_for(lambda: _recomputed(key, None, generation))
+    if latest is not None:
+        return latest[0]
+    # The lock holder is stuck or gone
+    return _compute_and_store(key, compute, timeout, generation)
+
+
+# Generated documents
+
+def write_document(path, write):
+    """Atomically (re)write a generated text document at path using write(outfile)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with open(fd, 'w', encoding='utf-8') as outfile:
+            write(outfile)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,140 @@
+import atexit
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+
+from .models import Post
+
+
+# View counting
+#
+# Views are buffered in process and written back in one UPDATE per flush,
+# instead of one write per PostDetailView hit (which serializes on SQLite).
+# A daemon thread in each worker flushes the buffer (and rebuilds the trending
+# ranking) every VIEW_COUNT_FLUSH_INTERVAL, and the request that fills it past
+# VIEW_COUNT_FLUSH_THRESHOLD flushes it inline. A worker that is killed loses
+# at most one interval of views.
+
+logger = logging.getLogger(__name__)
+
+TRENDING_CACHE_KEY = 'trending:post_ids'
+# Scores are stored relative to this instant (see _log_weight)
+TRENDING_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+
+_pending = Counter()
+_lock = threading.Lock()
+# Process the flusher thread was started in; a forked worker starts its own
+_flusher_pid = None
+
+
+def record_view(post_id):
+    """Count one view; flushes the buffer once it is large enough"""
+    with _lock:
+        _pending[post_id] += 1
+        due = sum(_pending.values()) >= settings.VIEW_COUNT_FLUSH_THRESHOLD
+    _start_flusher()
+    if due:
+        flush_views()
+
+
+def _start_flusher():
+    global _flusher_pid
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_periodically, name='view-count-flusher', daemon=True).start()
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(settings.VIEW_COUNT_FLUSH_INTERVAL)
+        if not _pending:
+            continue
+        try:
+            flush_views()
+        except Exception:
+            logger.exception('Periodic view count flush failed')
+        finally:
+            # Don't keep this thread's database connections open between flushes
+            connections.close_all()
+
+
+def _log_weight(views, now):
+    # The decayed score sum(views * 2 ** -(age / half_life)) ranks posts the same
+    # way as sum(views * 2 ** ((t - epoch) / half_life)), which never has to be
+    # decayed in place. Keeping its logarithm stops it from overflowing.
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 60 * 60
+    return math.log(views) + (now - TRENDING_EPOCH) / half_life * math.log(2)
+
+
+def _log_add(score, weight):
+    # log(e**score + e**weight), computed by the database from the stored score
+    return Case(
+        When(trending_score__isnull=True, then=weight),
+        default=Greatest(score, weight) + Ln(1 + Exp(-Abs(score - weight))),
+        output_field=FloatField(),
+    )
+
+
+def flush_views(now=None):
+    """Write buffered views back with a single UPDATE and refresh the trending ranking"""
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending:
+        return 0
+
+    now = time.time() if now is None else now
+    # One statement reading and writing the stored values, so concurrent flushes from
+    # other workers add up instead of overwriting each other
+    weight = Case(*[When(pk=pk, then=Value(_log_weight(views, now))) for pk, views in pending.items()], output_field=FloatField())
+    updated = Post.objects.filter(pk__in=pending).update(
+        view_count=F('view_count') + Case(
+            *[When(pk=pk, then=Value(views)) for pk, views in pending.items()],
+            output_field=IntegerField(),
+        ),
+        trending_score=_log_add(F('trending_score'), weight),
+    )
+    if not updated:
+        return 0
+    rebuild_trending()
+    if updated == len(pending):
+        return sum(pending.values())
+    # Some posts were deleted; flushes can run inside replica-read views, so ask the primary
+    existing = Post.objects.using(DEFAULT_DB_ALIAS).filter(pk__in=pending).values_list('pk', flat=True)
+    return sum(pending[pk] for pk in existing)
+
+
+def rebuild_trending():
+    """Precompute the ids of the top trending posts"""
+    post_ids = list(
+        Post.objects.using(DEFAULT_DB_ALIAS).filter(trending_score__isnull=False)
+        .order_by('-trending_score')
+        .values_list('pk', flat=True)[:settings.TRENDING_SIZE]
+    )
+    cache.set(TRENDING_CACHE_KEY, post_ids, None)
+    return post_ids
+
+
+def get_trending_posts():
+    """Trending posts for listing cards, in ranking order"""
+    post_ids = cache.get(TRENDING_CACHE_KEY)
+    if post_ids is None:
+        post_ids = rebuild_trending()
+    posts = Post.objects.for_cards().in_bulk(post_ids)
+    return [posts[pk] for pk in post_ids if pk in posts]
+
+
+# Don't drop the tail of the buffer on a clean worker shutdown
+atexit.register(lambda: flush_views() if _pending else None)
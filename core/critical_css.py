@@ -0,0 +1,300 @@
+import gzip
+import hashlib
+import json
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.template.loader import get_template
+
+from .templatetags.partials import PARTIAL_TEMPLATES
+
+
+# Pages that get their own critical stylesheet: name -> template
+CRITICAL_PAGES = {
+    'home': 'core/home.html',
+    'post_list': 'core/post_list.html',
+    'post_detail': 'core/post_detail.html',
+    'about': 'core/about.html',
+    'contact': 'core/contact.html',
+}
+
+STYLESHEET = 'css/output.css'
+CRITICAL_DIR = 'css/critical'
+REPORT_NAME = 'report.json'
+
+# Only these layers hold per-class rules worth filtering. The base reset is
+# always kept; custom property definitions are pruned to what is referenced.
+FILTERED_LAYERS = ('@layer utilities', '@layer components')
+CONDITIONAL_AT_RULES = ('@media', '@supports', '@container')
+# Utilities that only animate later changes
+MOTION_PREFIXES = ('transition', 'duration-', 'ease-', 'delay-')
+# States that only follow user interaction, so never apply at first paint
+INTERACTIVE_RE = re.compile(r':(?:hover|focus|focus-visible|focus-within|active)\b')
+
+# Template source after this comment is below the fold and left to the full stylesheet
+FOLD_MARKER = '{# below the fold #}'
+
+CLASS_ATTR_RE = re.compile(r'''class\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+TEMPLATE_REF_RE = re.compile(r'''{%\s*(?:include|extends)\s+['"]([^'"]+)['"]''')
+# Tags that render a partial template, e.g. {% post_card post %}
+PARTIAL_TAG_RE = re.compile(r'{%\s*(' + '|'.join(map(re.escape, PARTIAL_TEMPLATES)) + r')\b')
+SELECTOR_CLASS_RE = re.compile(r'\.((?:\\.|[\w-])+)')
+VAR_REF_RE = re.compile(r'var\(\s*(--[\w-]+)')
+VAR_DECL_RE = re.compile(r'^(--[\w-]+)\s*:')
+# Blocks that only define custom properties; pruned to the ones still referenced
+DEFINITION_BLOCKS = ('@layer theme', '@layer properties', '@property')
+
+
+# CSS parsing
+#
+# Just enough of a parser for Tailwind's output: blocks (including nested
+# rules) become {'prelude': ..., 'children': [...]}, declarations and
+# statements stay as plain strings.
+
+def parse_css(css):
+    root = []
+    stack = [root]
+    buffer = []
+    i = 0
+    while i < len(css):
+        char = css[i]
+        if css.startswith('/*', i):
+            end = css.find('*/', i + 2)
+            i = len(css) if end == -1 else end + 2
+            continue
+        if char in '"\'':
+            end = i + 1
+            while end < len(css) and css[end] != char:
+                end += 2 if css[end] == '\\' else 1
+            buffer.append(css[i:end + 1])
+            i = end + 1
+            continue
+        if char == '{':
+            node = {'prelude': ''.join(buffer).strip(), 'children': []}
+            stack[-1].append(node)
+            stack.append(node['children'])
+            buffer = []
+        elif char == '}':
+            text = ''.join(buffer).strip()
+            if text:
+                stack[-1].append(text)
+            buffer = []
+            if len(stack) > 1:
+                stack.pop()
+        elif char == ';':
+            text = ''.join(buffer).strip()
+            if text:
+                stack[-1].append(text + ';')
+            buffer = []
+        else:
+            buffer.append(char)
+        i += 1
+    return root
+
+
+def serialize_css(nodes):
+    parts = []
+    for node in nodes:
+        if isinstance(node, str):
+            parts.append(node)
+        else:
+            parts.append(f"{node['prelude']}{{{serialize_css(node['children'])}}}")
+    return ''.join(parts)
+
+
+def _split_selector_list(prelude):
+    parts, depth, current = [], 0, []
+    for char in prelude:
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        if char == ',' and depth == 0:
+            parts.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append(''.join(current))
+    return parts
+
+
+def selector_matches(prelude, used_classes):
+    """True if any selector in the list only needs classes that the page uses"""
+    for selector in _split_selector_list(prelude):
+        classes = {re.sub(r'\\(.)', r'\1', name) for name in SELECTOR_CLASS_RE.findall(selector)}
+        if classes <= used_classes:
+            return True
+    return False
+
+
+def _is_interactive(prelude):
+    return all(INTERACTIVE_RE.search(selector) for selector in _split_selector_list(prelude))
+
+
+def _drop_interactive(nodes):
+    kept = []
+    for node in nodes:
+        if isinstance(node, str):
+            kept.append(node)
+        elif not node['prelude'].startswith('@') and _is_interactive(node['prelude']):
+            continue
+        else:
+            children = _drop_interactive(node['children'])
+            if children:
+                kept.append({'prelude': node['prelude'], 'children': children})
+    return kept
+
+
+def _filter_rules(nodes, used_classes):
+    kept = []
+    for node in nodes:
+        if isinstance(node, str):
+            kept.append(node)
+        elif node['prelude'].startswith(CONDITIONAL_AT_RULES):
+            children = _filter_rules(node['children'], used_classes)
+            if children:
+                kept.append({'prelude': node['prelude'], 'children': children})
+        elif node['prelude'].startswith('@') or selector_matches(node['prelude'], used_classes):
+            kept.append(node)
+    return _drop_interactive(kept)
+
+
+def _is_definition_block(node):
+    return isinstance(node, dict) and node['prelude'].startswith(DEFINITION_BLOCKS)
+
+
+def _declarations(nodes):
+    for node in nodes:
+        if isinstance(node, str):
+            yield node
+        else:
+            yield from _declarations(node['children'])
+
+
+def _filter_declarations(nodes, used_properties):
+    kept = []
+    for node in nodes:
+        if isinstance(node, str):
+            match = VAR_DECL_RE.match(node)
+            if not match or match.group(1) in used_properties:
+                kept.append(node)
+        else:
+            children = _filter_declarations(node['children'], used_properties)
+            if children:
+                kept.append({'prelude': node['prelude'], 'children': children})
+    return kept
+
+
+def _prune_custom_properties(nodes):
+    usage = serialize_css([node for node in nodes if not _is_definition_block(node)])
+    used = set(VAR_REF_RE.findall(usage))
+    used |= {match.group(1) for match in map(VAR_DECL_RE.match, _declarations(
+        [node for node in nodes if not _is_definition_block(node)])) if match}
+
+    # Theme values may point at other theme values (--default-font-family: var(--font-sans))
+    definitions = {}
+    for node in nodes:
+        if _is_definition_block(node):
+            for declaration in _declarations(node['children']):
+                match = VAR_DECL_RE.match(declaration)
+                if match:
+                    definitions[match.group(1)] = declaration
+    pending = list(used)
+    while pending:
+        for name in VAR_REF_RE.findall(definitions.get(pending.pop(), '')):
+            if name not in used:
+                used.add(name)
+                pending.append(name)
+
+    kept = []
+    for node in nodes:
+        if not _is_definition_block(node):
+            kept.append(node)
+        elif node['prelude'].startswith('@property'):
+            if node['prelude'].split()[1] in used:
+                kept.append(node)
+        else:
+            kept.append({'prelude': node['prelude'], 'children': _filter_declarations(node['children'], used)})
+    return kept
+
+
+def extract_critical(nodes, used_classes):
+    """Return the subset of a parsed stylesheet needed to style the given classes"""
+    kept = []
+    for node in nodes:
+        if isinstance(node, dict) and node['prelude'].startswith(FILTERED_LAYERS):
+            children = _filter_rules(node['children'], used_classes)
+            if children:
+                kept.append({'prelude': node['prelude'], 'children': children})
+        else:
+            kept.append(node)
+    return _prune_custom_properties(kept)
+
+
+# Template scanning
+
+def template_classes(template_name, seen=None):
+    """
+    Collect the static class names used above the fold (FOLD_MARKER) by a
+    template, its parents, its includes and its partial tags
+    """
+    seen = set() if seen is None else seen
+    if template_name in seen:
+        return set()
+    seen.add(template_name)
+
+    source = Path(get_template(template_name).origin.name).read_text(encoding='utf-8')
+    source = source.split(FOLD_MARKER, 1)[0]
+    classes = set()
+    for double, single in CLASS_ATTR_RE.findall(source):
+        for token in (double or single).split():
+            # Skip template syntax; those classes are picked up by the deferred stylesheet
+            if not any(mark in token for mark in '{}%'):
+                classes.add(token)
+    referenced = TEMPLATE_REF_RE.findall(source) + [PARTIAL_TEMPLATES[tag] for tag in PARTIAL_TAG_RE.findall(source)]
+    for name in referenced:
+        classes |= template_classes(name, seen)
+    return classes
+
+
+# Build
+
+def critical_dir():
+    return Path(settings.BASE_DIR) / 'static' / CRITICAL_DIR
+
+
+def read_stylesheet():
+    return (Path(settings.BASE_DIR) / 'static' / STYLESHEET).read_bytes()
+
+
+def page_critical_css(nodes, template_name):
+    """The critical CSS of a page, as bytes; motion utilities only matter once it is interacted with"""
+    used_classes = {name for name in template_classes(template_name) if not name.startswith(MOTION_PREFIXES)}
+    return serialize_css(extract_critical(nodes, used_classes)).encode('utf-8')
+
+
+def build_critical_css(pages=CRITICAL_PAGES):
+    """Write css/critical/<page>.css for every page and return the size report"""
+    stylesheet = read_stylesheet()
+    nodes = parse_css(stylesheet.decode('utf-8'))
+    output_dir = critical_dir()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    report = {
+        'stylesheet': STYLESHEET,
+        'stylesheet_hash': hashlib.md5(stylesheet).hexdigest()[:12],
+        'stylesheet_bytes': len(stylesheet),
+        'stylesheet_gzip_bytes': len(gzip.compress(stylesheet, mtime=0)),
+        'pages': {},
+    }
+    for page, template_name in pages.items():
+        critical = page_critical_css(nodes, template_name)
+        (output_dir / f'{page}.css').write_bytes(critical)
+        report['pages'][page] = {
+            'template': template_name,
+            'critical_bytes': len(critical),
+            'critical_gzip_bytes': len(gzip.compress(critical, mtime=0)),
+        }
+    (output_dir / REPORT_NAME).write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+    return report
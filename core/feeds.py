@@ -0,0 +1,200 @@
+import datetime
+import json
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import Max
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.encoding import iri_to_uri
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed, SyndicationFeed, rfc3339_date
+
+from .caching import get_generation, single_flight, wait_for, write_document
+from .models import Post, Tag
+
+
+FEED_NAMESPACE = 'feeds'
+FEED_CHUNK_SIZE = 500
+
+
+class StreamingFeedMixin:
+    """Feed generator that pulls its items from an iterator while writing"""
+
+    def __init__(self, *args, items=(), latest=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.items = items
+        self.latest = latest
+
+    def latest_post_date(self):
+        # The default implementation walks self.items, which would exhaust the iterator
+        return self.latest or datetime.datetime.now(tz=datetime.timezone.utc)
+
+
+class RssFeed(StreamingFeedMixin, Rss201rev2Feed):
+    pass
+
+
+class AtomFeed(StreamingFeedMixin, Atom1Feed):
+    pass
+
+
+class JSONFeed(StreamingFeedMixin, SyndicationFeed):
+    """JSON Feed 1.1 (https://jsonfeed.org/version/1.1)"""
+    content_type = 'application/feed+json; charset=utf-8'
+
+    def item_data(self, item):
+        data = {
+            'id': item['unique_id'] or item['link'],
+            'url': item['link'],
+            'title': item['title'],
+            'summary': item['description'],
+        }
+        if item['pubdate']:
+            data['date_published'] = rfc3339_date(item['pubdate'])
+        if item['updateddate']:
+            data['date_modified'] = rfc3339_date(item['updateddate'])
+        if item['author_name']:
+            data['authors'] = [{'name': item['author_name'], 'url': item['author_link']}]
+        if item['categories']:
+            data['tags'] = list(item['categories'])
+        return data
+
+    def write(self, outfile, encoding):
+        header = {
+            'version': 'https://jsonfeed.org/version/1.1',
+            'title': self.feed['title'],
+            'home_page_url': self.feed['link'],
+            'feed_url': self.feed['feed_url'],
+            'description': self.feed['description'],
+        }
+        # Write the envelope by hand so items can be emitted one at a time
+        outfile.write(json.dumps(header)[:-1] + ', "items": [')
+        for index, item in enumerate(self.items):
+            if index:
+                outfile.write(', ')
+            outfile.write(json.dumps(self.item_data(item)))
+        outfile.write(']}')
+
+
+FEED_FORMATS = {
+    'rss': RssFeed,
+    'atom': AtomFeed,
+    'json': JSONFeed,
+}
+
+
+def get_feed_scope(scope, pk=None):
+    """Return (posts, title) for a feed scope"""
+    posts = Post.objects.for_cards().order_by('-created_at')
+    if scope == 'tag':
+        tag = get_object_or_404(Tag, pk=pk)
+        return posts.filter(tags=tag), f'CABRELBLOG - Posts tagged "{tag.name}"'
+    if scope == 'author':
+        author = get_object_or_404(User, pk=pk)
+        return posts.filter(author=author), f'CABRELBLOG - Posts by {author.username}'
+    return posts, 'CABRELBLOG - Latest posts'
+
+
+def feed_url(fmt, scope, pk=None):
+    if scope == 'all':
+        return reverse('post feed', kwargs={'fmt': fmt})
+    return reverse(f'{scope} feed', kwargs={'fmt': fmt, 'pk': pk})
+
+
+def _post_item(post, base_url):
+    link = base_url + reverse('post detail', kwargs={'pk': post.pk})
+    return {
+        'title': post.title,
+        'link': iri_to_uri(link),
+        'description': post.excerpt,
+        'author_email': None,
+        'author_name': post.author.username,
+        'author_link': iri_to_uri(base_url + reverse('profile detail', kwargs={'pk': post.author_id})),
+        'pubdate': post.created_at,
+        'updateddate': post.updated_at,
+        'comments': None,
+        'unique_id': link,
+        'unique_id_is_permalink': True,
+        'enclosures': (),
+        'categories': [tag.name for tag in post.tags.all()],
+        'item_copyright': None,
+        'ttl': None,
+    }
+
+
+def write_feed(outfile, fmt, scope, pk, base_url):
+    """Write a feed document to outfile without materialising all posts"""
+    posts, title = get_feed_scope(scope, pk)
+    latest = posts.aggregate(latest=Max('updated_at'))['latest']
+    if settings.FEED_ITEMS_LIMIT:
+        posts = posts[:settings.FEED_ITEMS_LIMIT]
+
+    feed = FEED_FORMATS[fmt](
+        title=title,
+        link=base_url + reverse('all posts'),
+        description='Articles, projects, and insights on building with Django and modern web tools.',
+        language=settings.LANGUAGE_CODE,
+        feed_url=base_url + feed_url(fmt, scope, pk),
+        items=(_post_item(post, base_url) for post in posts.iterator(chunk_size=FEED_CHUNK_SIZE)),
+        latest=latest,
+    )
+    feed.write(outfile, 'utf-8')
+
+
+def _feed_dir():
+    return Path(settings.CACHE_ROOT) / FEED_NAMESPACE
+
+
+def _older_generations(generation):
+    """Generations before generation with a directory on disk, newest first"""
+    if not _feed_dir().is_dir():
+        return []
+    return sorted(
+        (int(directory.name) for directory in _feed_dir().iterdir() if directory.is_dir() and directory.name.isdigit() and int(directory.name) < generation),
+        reverse=True,
+    )
+
+
+def _previous_document(path, generation):
+    """(path, generation) of the same document in the newest older generation still on disk"""
+    for previous in _older_generations(generation):
+        candidate = _feed_dir() / str(previous) / path.name
+        if candidate.exists():
+            return candidate, previous
+    return None
+
+
+def get_feed_document(fmt, scope, pk):
+    """
+    Return (path, generation) of the cached feed document, building it if the
+    current generation has not been written yet. While one request builds
+    it, the others get the previous generation's document.
+    """
+    generation = get_generation(FEED_NAMESPACE)
+    base_url = settings.SITE_URL.rstrip('/')
+    generation_dir = _feed_dir() / str(generation)
+    path = generation_dir / f'{scope}-{pk or 0}.{fmt}'
+    if path.exists():
+        return path, generation
+
+    with single_flight(f'{FEED_NAMESPACE}:{generation}:{path.name}') as leader:
+        if leader:
+            if not path.exists():
+                write_document(path, lambda outfile: write_feed(outfile, fmt, scope, pk, base_url))
+                _drop_old_generations(generation)
+            return path, generation
+
+    previous = _previous_document(path, generation)
+    if previous is not None:
+        return previous
+    if wait_for(lambda: path.exists() or None) is None:
+        write_document(path, lambda outfile: write_feed(outfile, fmt, scope, pk, base_url))
+    return path, generation
+
+
+def _drop_old_generations(generation):
+    # The previous generation stays, since other requests may be serving from it right now
+    for stale in _older_generations(generation)[1:]:
+        shutil.rmtree(_feed_dir() / str(stale), ignore_errors=True)
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+
+from .caching import get_generation
+from .models import Service
+
+
+# Prebuilt page fragments
+#
+# Fragments that only change through the admin are rendered once per
+# generation and served from the cache; model signals bump the generation.
+
+SERVICES_NAMESPACE = 'services'
+
+
+def services_html():
+    """The rendered service cards, rebuilt only after a Service changes"""
+    key = f'fragment:{SERVICES_NAMESPACE}:{get_generation(SERVICES_NAMESPACE)}'
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string('core/partials/service_list.html', {'services': Service.objects.all()})
+        # Older generations are never read again and expire after FRAGMENT_CACHE_TIMEOUT
+        cache.set(key, html, settings.FRAGMENT_CACHE_TIMEOUT)
+    return html
+
+
+# Fragment responses
+#
+# Interactive post actions (inline edit, like, comment) answer fetch() and
+# HTMX requests with just the region that changed. Counters shown elsewhere
+# on the page ride along as out-of-band partials: their root element has
+# hx-swap-oob and replaces the element with the same id.
+
+def wants_fragment(request):
+    """True for HTMX requests and the fetch() calls in static/js/input.js"""
+    return request.headers.get('HX-Request') == 'true' or request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+
+def fragment_response(request, template_name, context, oob=(), status=200):
+    """Render template_name followed by each oob template, rendered with oob=True"""
+    parts = [render_to_string(template_name, context, request)]
+    parts += [render_to_string(name, {**context, 'oob': True}, request) for name in oob]
+    return HttpResponse(''.join(parts), status=status)
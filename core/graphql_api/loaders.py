@@ -0,0 +1,99 @@
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.db.models import Count
+
+from core.models import Comment, Like, Post
+
+
+# Per-request DataLoaders
+#
+# The endpoint executes synchronously, so a loader can't wait for sibling
+# resolvers to queue their keys the way an asyncio DataLoader does. Instead
+# every object handed out by a list resolver or a loader remembers the batch
+# it came with, and the first miss for any of them loads the keys of the
+# whole batch in one query.
+
+class DataLoader:
+    def __init__(self, batch_load, default=None):
+        # batch_load(keys) -> {key: value}; keys it leaves out get `default`
+        self.batch_load = batch_load
+        self.default = default
+        self.cache = {}
+
+    def load(self, key, siblings=()):
+        if key not in self.cache:
+            keys = {key, *siblings} - self.cache.keys()
+            loaded = self.batch_load(list(keys))
+            for missing in keys - loaded.keys():
+                loaded[missing] = self.default() if callable(self.default) else self.default
+            mark_batch(
+                item for value in loaded.values()
+                for item in (value if isinstance(value, list) else [value])
+                if isinstance(item, models.Model)
+            )
+            self.cache.update(loaded)
+        return self.cache[key]
+
+
+def mark_batch(objects):
+    """Remember that objects were fetched together so their relations can be too"""
+    objects = list(objects)
+    for obj in objects:
+        obj._batch = objects
+    return objects
+
+
+def _group(rows, key):
+    grouped = defaultdict(list)
+    for row in rows:
+        grouped[key(row)].append(row)
+    return grouped
+
+
+def _users(ids):
+    # Profiles ride along, so post -> author -> profile costs one query
+    return User.objects.select_related('profile').in_bulk(ids)
+
+
+def _tags_by_post(post_ids):
+    links = Post.tags.through.objects.filter(post_id__in=post_ids).select_related('tag').order_by('tag__name')
+    return {post_id: [link.tag for link in group] for post_id, group in _group(links, lambda link: link.post_id).items()}
+
+
+def _categories_by_post(post_ids):
+    links = Post.category.through.objects.filter(post_id__in=post_ids).select_related('category').order_by('category__name')
+    return {post_id: [link.category for link in group] for post_id, group in _group(links, lambda link: link.post_id).items()}
+
+
+def _comments_by_post(post_ids):
+    return _group(Comment.objects.filter(post_id__in=post_ids).order_by('created_at'), lambda comment: comment.post_id)
+
+
+def _counts(model, post_ids):
+    return dict(model.objects.filter(post_id__in=post_ids).order_by().values('post_id').annotate(total=Count('pk')).values_list('post_id', 'total'))
+
+
+LOADERS = {
+    'users': (_users, None),
+    'tags_by_post': (_tags_by_post, list),
+    'categories_by_post': (_categories_by_post, list),
+    'comments_by_post': (_comments_by_post, list),
+    'comment_counts': (lambda post_ids: _counts(Comment, post_ids), 0),
+    'like_counts': (lambda post_ids: _counts(Like, post_ids), 0),
+}
+
+
+def get_loaders(info):
+    """The loaders of the request being executed, created on first use"""
+    request = info.context
+    if not hasattr(request, '_graphql_loaders'):
+        request._graphql_loaders = {name: DataLoader(batch_load, default) for name, (batch_load, default) in LOADERS.items()}
+    return request._graphql_loaders
+
+
+def load(info, loader, root, key):
+    """Load key(root) with `loader`, batched with the objects root was fetched alongside"""
+    batch = getattr(root, '_batch', None) or (root,)
+    return get_loaders(info)[loader].load(key(root), (key(obj) for obj in batch))
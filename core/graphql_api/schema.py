@@ -0,0 +1,162 @@
+import graphene
+from django.conf import settings
+from django.contrib.auth.models import User
+
+from core.models import Category, Portfolio, Post, Tag
+from .loaders import load, mark_batch
+
+
+def _page(queryset, first, offset):
+    first = max(0, min(first or settings.GRAPHQL_PAGE_SIZE, settings.GRAPHQL_MAX_PAGE_SIZE))
+    return mark_batch(queryset[offset:offset + first])
+
+
+def _file_url(file):
+    return file.url if file else None
+
+
+class ProfileType(graphene.ObjectType):
+    bio = graphene.String()
+    profession = graphene.String()
+    location = graphene.String()
+    website = graphene.String()
+    github = graphene.String()
+    twitter = graphene.String()
+    linkedin = graphene.String()
+    image_url = graphene.String()
+
+    def resolve_image_url(profile, info):
+        return _file_url(profile.image)
+
+
+class UserType(graphene.ObjectType):
+    id = graphene.ID(required=True)
+    username = graphene.String(required=True)
+    first_name = graphene.String()
+    last_name = graphene.String()
+    profile = graphene.Field(ProfileType)
+
+    def resolve_profile(user, info):
+        # Loaded together with the user (see loaders._users)
+        return getattr(user, 'profile', None)
+
+
+class TagType(graphene.ObjectType):
+    id = graphene.ID(required=True)
+    name = graphene.String(required=True)
+
+
+class CategoryType(graphene.ObjectType):
+    id = graphene.ID(required=True)
+    name = graphene.String(required=True)
+
+
+class CommentType(graphene.ObjectType):
+    id = graphene.ID(required=True)
+    content = graphene.String(required=True)
+    created_at = graphene.DateTime(required=True)
+    author = graphene.Field(UserType, required=True)
+
+    def resolve_author(comment, info):
+        return load(info, 'users', comment, lambda obj: obj.author_id)
+
+
+class PostType(graphene.ObjectType):
+    id = graphene.ID(required=True)
+    title = graphene.String(required=True)
+    excerpt = graphene.String()
+    content_html = graphene.String()
+    word_count = graphene.Int()
+    reading_minutes = graphene.Int()
+    view_count = graphene.Int()
+    image_url = graphene.String()
+    created_at = graphene.DateTime(required=True)
+    updated_at = graphene.DateTime(required=True)
+    author = graphene.Field(UserType, required=True)
+    tags = graphene.List(graphene.NonNull(TagType), required=True)
+    categories = graphene.List(graphene.NonNull(CategoryType), required=True)
+    comments = graphene.List(graphene.NonNull(CommentType), required=True)
+    comment_count = graphene.Int(required=True)
+    like_count = graphene.Int(required=True)
+
+    def resolve_image_url(post, info):
+        return _file_url(post.image)
+
+    def resolve_author(post, info):
+        return load(info, 'users', post, lambda obj: obj.author_id)
+
+    def resolve_tags(post, info):
+        return load(info, 'tags_by_post', post, lambda obj: obj.pk)
+
+    def resolve_categories(post, info):
+        return load(info, 'categories_by_post', post, lambda obj: obj.pk)
+
+    def resolve_comments(post, info):
+        return load(info, 'comments_by_post', post, lambda obj: obj.pk)
+
+    def resolve_comment_count(post, info):
+        return load(info, 'comment_counts', post, lambda obj: obj.pk)
+
+    def resolve_like_count(post, info):
+        return load(info, 'like_counts', post, lambda obj: obj.pk)
+
+
+class PortfolioType(graphene.ObjectType):
+    id = graphene.ID(required=True)
+    title = graphene.String(required=True)
+    slug = graphene.String(required=True)
+    portfolio_type = graphene.String()
+    status = graphene.String()
+    short_description = graphene.String()
+    technologies = graphene.List(graphene.NonNull(graphene.String), required=True)
+    featured_image_url = graphene.String()
+    live_url = graphene.String()
+    github_url = graphene.String()
+    is_featured = graphene.Boolean()
+    created_at = graphene.DateTime()
+
+    def resolve_technologies(portfolio, info):
+        return portfolio.get_technologies_list()
+
+    def resolve_featured_image_url(portfolio, info):
+        return _file_url(portfolio.featured_image)
+
+
+class Query(graphene.ObjectType):
+    posts = graphene.List(
+        graphene.NonNull(PostType), required=True,
+        first=graphene.Int(), offset=graphene.Int(default_value=0),
+        tag=graphene.ID(), author=graphene.ID(),
+    )
+    post = graphene.Field(PostType, id=graphene.ID(required=True))
+    tags = graphene.List(graphene.NonNull(TagType), required=True)
+    categories = graphene.List(graphene.NonNull(CategoryType), required=True)
+    portfolio = graphene.List(graphene.NonNull(PortfolioType), required=True, first=graphene.Int(), offset=graphene.Int(default_value=0))
+    user = graphene.Field(UserType, username=graphene.String(required=True))
+
+    def resolve_posts(root, info, first=None, offset=0, tag=None, author=None):
+        # The Markdown source is never exposed
+        posts = Post.objects.defer('content', 'toc_html').order_by('-created_at')
+        if tag is not None:
+            posts = posts.filter(tags=tag)
+        if author is not None:
+            posts = posts.filter(author=author)
+        return _page(posts, first, offset)
+
+    def resolve_post(root, info, id):
+        return Post.objects.defer('content', 'toc_html').filter(pk=id).first()
+
+    def resolve_tags(root, info):
+        return Tag.objects.order_by('name')
+
+    def resolve_categories(root, info):
+        return Category.objects.order_by('name')
+
+    def resolve_portfolio(root, info, first=None, offset=0):
+        return _page(Portfolio.objects.filter(is_public=True), first, offset)
+
+    def resolve_user(root, info, username):
+        return User.objects.select_related('profile').filter(username=username).first()
+
+
+schema = graphene.Schema(query=Query)
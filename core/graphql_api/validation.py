@@ -0,0 +1,73 @@
+from django.conf import settings
+from graphql import GraphQLError, ValidationRule, get_named_type, is_list_type, specified_rules
+from graphql.language import FieldNode, FragmentDefinitionNode, FragmentSpreadNode, InlineFragmentNode, OperationDefinitionNode
+from graphql.type import GraphQLNonNull
+from graphene.validation import depth_limit_validator
+
+
+def _list_size(field_node, field):
+    # Paginated fields are as big as their `first` argument (the maximum when it
+    # comes from a variable); other lists get an estimate
+    for argument in field_node.arguments:
+        if argument.name.value == 'first':
+            value = getattr(argument.value, 'value', None)
+            return int(value) if value is not None else settings.GRAPHQL_MAX_PAGE_SIZE
+    if 'first' in field.args:
+        return settings.GRAPHQL_PAGE_SIZE
+    return settings.GRAPHQL_LIST_SIZE_ESTIMATE
+
+
+def selection_cost(selection_set, parent_type, fragments, seen=()):
+    """Number of values a selection can produce: each field counts once per parent it is resolved for"""
+    cost = 0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            if selection.name.value.startswith('__'):
+                continue
+            field = parent_type.fields.get(selection.name.value)
+            if field is None:
+                continue
+            cost += 1
+            if selection.selection_set:
+                field_type = field.type.of_type if isinstance(field.type, GraphQLNonNull) else field.type
+                multiplier = _list_size(selection, field) if is_list_type(field_type) else 1
+                cost += multiplier * selection_cost(selection.selection_set, get_named_type(field_type), fragments, seen)
+        elif isinstance(selection, InlineFragmentNode):
+            cost += selection_cost(selection.selection_set, parent_type, fragments, seen)
+        elif isinstance(selection, FragmentSpreadNode):
+            name = selection.name.value
+            if name in fragments and name not in seen:
+                cost += selection_cost(fragments[name].selection_set, parent_type, fragments, (*seen, name))
+    return cost
+
+
+class ComplexityLimitRule(ValidationRule):
+    """Reject operations that could resolve more than GRAPHQL_MAX_COMPLEXITY fields"""
+
+    def enter_document(self, document, *args):
+        fragments = {
+            definition.name.value: definition
+            for definition in document.definitions if isinstance(definition, FragmentDefinitionNode)
+        }
+        schema = self.context.schema
+        for definition in document.definitions:
+            if not isinstance(definition, OperationDefinitionNode):
+                continue
+            root_type = schema.get_root_type(definition.operation)
+            if root_type is None:
+                continue
+            cost = selection_cost(definition.selection_set, root_type, fragments)
+            if cost > settings.GRAPHQL_MAX_COMPLEXITY:
+                self.report_error(GraphQLError(
+                    f"Operation '{definition.name.value if definition.name else 'anonymous'}' has complexity {cost}, "
+                    f'over the limit of {settings.GRAPHQL_MAX_COMPLEXITY}.',
+                    definition,
+                ))
+
+
+def validation_rules():
+    return (
+        *specified_rules,
+        depth_limit_validator(max_depth=settings.GRAPHQL_MAX_DEPTH),
+        ComplexityLimitRule,
+    )
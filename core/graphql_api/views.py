@@ -0,0 +1,51 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.views.decorators.csrf import csrf_exempt
+from graphene_django.views import GraphQLView, HttpError
+
+from .schema import schema
+from .validation import validation_rules
+
+
+class PersistedQueryGraphQLView(GraphQLView):
+    """
+    GraphQLView that also accepts automatic persisted queries: a client
+    sends {"extensions": {"persistedQuery": {"version": 1, "sha256Hash": ...}}}
+    without the query text and only has to send the text again (with the
+    hash) when the server answers PERSISTED_QUERY_NOT_FOUND. Hash-only GETs
+    keep request URLs short and cacheable.
+    """
+
+    def get_graphql_params(self, request, data):
+        query, variables, operation_name, id = super().get_graphql_params(request, data)
+
+        extensions = request.GET.get('extensions') or data.get('extensions') or {}
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest('Extensions are invalid JSON.'))
+        persisted = extensions.get('persistedQuery') if isinstance(extensions, dict) else None
+        if not persisted:
+            return query, variables, operation_name, id
+
+        digest = str(persisted.get('sha256Hash', ''))
+        key = f'graphql:persisted:{digest}'
+        if query:
+            if hashlib.sha256(query.encode('utf-8')).hexdigest() != digest:
+                raise HttpError(HttpResponseBadRequest('provided sha does not match query'))
+            cache.set(key, query, settings.GRAPHQL_PERSISTED_QUERY_TTL)
+        else:
+            query = cache.get(key)
+            if query is None:
+                # Clients look for this exact message and retry with the query text
+                raise HttpError(HttpResponse(), 'PersistedQueryNotFound')
+        return query, variables, operation_name, id
+
+
+# The schema is read-only, so cross-site POSTs can't change anything
+graphql_view = csrf_exempt(PersistedQueryGraphQLView.as_view(schema=schema, validation_rules=validation_rules()))
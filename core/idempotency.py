@@ -0,0 +1,90 @@
+import logging
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseRedirect
+
+from .ratelimit import client_identity
+
+
+logger = logging.getLogger(__name__)
+
+FIELD_NAME = 'idempotency_key'
+HEADER_NAME = 'HTTP_IDEMPOTENCY_KEY'
+PENDING = 'pending'
+POLL_INTERVAL = 0.05
+
+
+def new_key():
+    return uuid.uuid4().hex
+
+
+def request_key(request):
+    """The submitted idempotency key, from the form field or an Idempotency-Key header"""
+    key = request.POST.get(FIELD_NAME) or request.META.get(HEADER_NAME, '')
+    # Anything else is a forged or truncated key; treat the request as unkeyed
+    return key if len(key) <= 64 and key.isalnum() else ''
+
+
+def _wait_for_result(cache_key):
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+    while time.monotonic() < deadline:
+        result = cache.get(cache_key)
+        if result != PENDING:
+            return result
+        time.sleep(POLL_INTERVAL)
+    return PENDING
+
+
+def idempotent(scope):
+    """
+    View decorator that runs a keyed POST at most once per user/IP.
+
+    The first request with a key claims it atomically (cache.add) and, once
+    it redirects (or answers 201 Created with a fragment), stores the
+    response for IDEMPOTENCY_TTL seconds. Repeats of that key
+    (double-clicks, client retries, concurrent duplicates) replay the
+    stored response without calling the view. Any other response (a form
+    with errors) releases the key.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            key = request_key(request) if request.method == 'POST' else ''
+            if not key:
+                return view_func(request, *args, **kwargs)
+
+            cache_key = f'idempotency:{scope}:{client_identity(request)}:{key}'
+            if not cache.add(cache_key, PENDING, settings.IDEMPOTENCY_TTL):
+                result = cache.get(cache_key)
+                if result == PENDING:
+                    # The original request is still running
+                    result = _wait_for_result(cache_key)
+                if result == PENDING:
+                    return HttpResponse('This request is already being processed.', status=409, content_type='text/plain')
+                if result is not None:
+                    logger.info('Replayed %s submission %s', scope, key)
+                    if 'location' not in result:
+                        return HttpResponse(result['content'], status=result['status'], content_type=result['content_type'])
+                    return HttpResponseRedirect(result['location'], status=result['status'])
+                # The original failed and released the key: process this one
+                return wrapped(request, *args, **kwargs)
+
+            try:
+                response = view_func(request, *args, **kwargs)
+            except BaseException:
+                cache.delete(cache_key)
+                raise
+            if response.status_code in (301, 302, 303) and response.has_header('Location'):
+                cache.set(cache_key, {'status': response.status_code, 'location': response['Location']}, settings.IDEMPOTENCY_TTL)
+            elif response.status_code == 201 and not response.streaming:
+                result = {'status': 201, 'content': response.content, 'content_type': response['Content-Type']}
+                cache.set(cache_key, result, settings.IDEMPOTENCY_TTL)
+            else:
+                cache.delete(cache_key)
+            return response
+        return wrapped
+    return decorator
@@ -0,0 +1,132 @@
+import base64
+import logging
+from io import BytesIO
+
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+
+# Image placeholders
+#
+# Every image field shown on pages has companion columns filled when a file
+# is uploaded (older files: manage.py backfill_image_placeholders):
+# <field>_width and <field>_height, so the browser reserves the image's box
+# before it loads, <field>_color, its dominant color, and <field>_lqip, a
+# blurry LQIP_SIZE px preview as a data URI. Templates only read these
+# columns; nothing opens an image file at request time.
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_SUFFIXES = ('width', 'height', 'color', 'lqip')
+
+# Longest side of the preview; it is blurred up to the full size by the browser
+LQIP_SIZE = 16
+LQIP_QUALITY = 40
+# Colors the preview is reduced to when picking the dominant one
+PALETTE_COLORS = 8
+
+# EXIF orientations that swap width and height
+EXIF_ORIENTATION = 0x0112
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def placeholder_fields(field_name):
+    return [f'{field_name}_{suffix}' for suffix in PLACEHOLDER_SUFFIXES]
+
+
+def measure_image(file):
+    """(width, height, dominant color, LQIP data URI) of an image file, as displayed"""
+    from PIL import Image, ImageOps, features  # Only uploads and the backfill pay for Pillow
+
+    with Image.open(file) as img:
+        width, height = img.size
+        if img.getexif().get(EXIF_ORIENTATION) in ROTATED_ORIENTATIONS:
+            width, height = height, width
+        # JPEGs are decoded at a fraction of their size, which is most of the work saved
+        img.draft('RGB', (LQIP_SIZE * 8, LQIP_SIZE * 8))
+        preview = ImageOps.exif_transpose(img).convert('RGBA')
+
+    preview.thumbnail((LQIP_SIZE, LQIP_SIZE))
+    # Transparent areas show the page's white background
+    preview = Image.alpha_composite(Image.new('RGBA', preview.size, 'white'), preview).convert('RGB')
+
+    palette = preview.quantize(colors=PALETTE_COLORS)
+    _, index = max(palette.getcolors())
+    color = '#{:02x}{:02x}{:02x}'.format(*palette.getpalette()[index * 3:index * 3 + 3])
+
+    image_format = 'WEBP' if features.check('webp') else 'JPEG'
+    buffer = BytesIO()
+    preview.save(buffer, image_format, quality=LQIP_QUALITY)
+    lqip = f'data:image/{image_format.lower()};base64,{base64.b64encode(buffer.getvalue()).decode()}'
+    return width, height, color, lqip
+
+
+def read_placeholder(file):
+    """measure_image() for a FieldFile or a stored name; None if it is missing or not an image"""
+    try:
+        if isinstance(file, str):
+            with default_storage.open(file, 'rb') as stored:
+                return measure_image(stored)
+        try:
+            return measure_image(file)
+        finally:
+            # An upload is written to storage after this, from the start
+            if file._committed:
+                file.close()
+            else:
+                file.seek(0)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as exc:
+        logger.warning('Could not read image %s: %s', file, exc)
+        return None
+
+
+def refresh_placeholder(instance, field_name, force=False):
+    """
+    Fill the placeholder columns of instance's image field when a new file
+    was assigned (or force is set, or they were never filled) and clear them
+    when the image is removed. Return the names of the columns that changed.
+    """
+    file = getattr(instance, field_name)
+    fields = placeholder_fields(field_name)
+    if not file:
+        values = (None, None, '', '')
+    elif file._committed and not force and getattr(instance, fields[0]) is not None:
+        return []
+    else:
+        values = read_placeholder(file)
+        if values is None:
+            return []
+
+    changed = []
+    for field, value in zip(fields, values):
+        if getattr(instance, field) != value:
+            setattr(instance, field, value)
+            changed.append(field)
+    return changed
+
+
+def measure_stored_batch(names):
+    """
+    Placeholder values for stored files, as [(name, values or None)]. A plain
+    function of the names so it can run in worker processes.
+    """
+    return [(name, read_placeholder(name)) for name in names]
+
+
+def placeholder_attrs(instance, field_name):
+    """
+    width, height and style attributes for an <img> of instance's image
+    field: its box is reserved, and shows the dominant color and the blurred
+    preview until the image has loaded
+    """
+    width, height, color, lqip = (getattr(instance, field) for field in placeholder_fields(field_name))
+    if not width:
+        return ''
+    style = []
+    if color:
+        style.append(f'background-color: {color}')
+    if lqip:
+        style += [f'background-image: url({lqip})', 'background-size: cover']
+    return format_html('width="{}" height="{}" style="{}"', width, height, '; '.join(style))
@@ -0,0 +1,18 @@
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.template.defaultfilters import date, pluralize
+from django.urls import reverse
+from jinja2 import Environment
+
+from .images import placeholder_attrs
+
+
+def url(name, *args):
+    return reverse(name, args=args)
+
+
+def environment(**options):
+    """Jinja2 environment for the partials in core/jinja2/, with the Django helpers they use"""
+    env = Environment(**options)
+    env.globals.update(static=staticfiles_storage.url, url=url, placeholder_attrs=placeholder_attrs)
+    env.filters.update(date=date, pluralize=pluralize)
+    return env
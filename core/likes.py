@@ -0,0 +1,67 @@
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Like
+
+
+# Like state for listing pages
+#
+# A page of cards needs, for each post, its like count and whether the
+# current user liked it. Both come from one query per page instead of two
+# per card; the user's liked ids are usually not queried at all, since they
+# are cached per user as a packed array of ids and dropped when they like
+# or unlike something.
+
+def _liked_ids_key(user_id):
+    return f'likes:user:{user_id}'
+
+
+def forget_liked_ids(user_id):
+    cache.delete(_liked_ids_key(user_id))
+
+
+def _cached_liked_ids(user):
+    packed = cache.get(_liked_ids_key(user.pk))
+    if packed is None:
+        limit = settings.LIKED_IDS_CACHE_LIMIT
+        ids = list(Like.objects.filter(user=user).order_by('post_id').values_list('post_id', flat=True)[:limit + 1])
+        if len(ids) > limit:
+            # Too many to carry around; look up each page instead
+            return None
+        packed = array('L', ids).tobytes()
+        cache.set(_liked_ids_key(user.pk), packed, settings.LIKED_IDS_CACHE_TIMEOUT)
+    ids = array('L')
+    ids.frombytes(packed)
+    return ids
+
+
+def liked_post_ids(user, post_ids):
+    """The ids among post_ids that user has liked"""
+    if not user.is_authenticated or not post_ids:
+        return set()
+    liked = _cached_liked_ids(user)
+    if liked is None:
+        return set(Like.objects.filter(user=user, post_id__in=post_ids).values_list('post_id', flat=True))
+    return set(post_ids).intersection(liked)
+
+
+def set_like_counts(posts):
+    """Set like_count on each post with a single grouped query"""
+    counts = dict(
+        Like.objects.filter(post__in=posts).order_by().values('post').annotate(count=Count('pk')).values_list('post', 'count')
+    )
+    for post in posts:
+        post.like_count = counts.get(post.pk, 0)
+
+
+def like_state(user, posts):
+    """Prepare a page of posts for like buttons; return the set of post ids user has liked"""
+    posts = list(posts)
+    if not user.is_authenticated:
+        # Anonymous visitors get a login prompt instead of a button and counter
+        return set()
+    set_like_counts(posts)
+    return liked_post_ids(user, [post.pk for post in posts])
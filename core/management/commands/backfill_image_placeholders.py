@@ -0,0 +1,67 @@
+import os
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from core.caching import bump_generation
+from core.images import measure_stored_batch, placeholder_fields
+from core.models import Portfolio, Post, Profile
+
+# Models, their image field and the cache namespace holding their instances
+IMAGE_FIELDS = [(Post, 'image', 'posts'), (Portfolio, 'featured_image', 'portfolio'), (Profile, 'image', None)]
+
+
+class Command(BaseCommand):
+    help = 'Record the dimensions, dominant color and preview of images uploaded before they were measured on upload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Image decoding processes')
+        parser.add_argument('--batch-size', type=int, default=50, help='Files per worker task')
+        parser.add_argument('--force', action='store_true', help='Measure every image again, not just unmeasured ones')
+
+    def handle(self, *args, **options):
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            for model, field_name, namespace in IMAGE_FIELDS:
+                measured, unreadable = self.backfill(pool, model, field_name, options)
+                if measured and namespace:
+                    bump_generation(namespace)
+                self.stdout.write(f'{model.__name__}.{field_name}: {measured} measured, {unreadable} missing or unreadable')
+        self.stdout.write(self.style.SUCCESS('Image placeholders backfilled'))
+
+    def backfill(self, pool, model, field_name, options):
+        fields = placeholder_fields(field_name)
+        rows = model.objects.exclude(**{f'{field_name}__isnull': True}).exclude(**{field_name: ''})
+        if not options['force']:
+            rows = rows.filter(**{f'{fields[0]}__isnull': True})
+
+        # Rows sharing a file (hashed storage keeps one copy per content) are measured once
+        pks_by_name = defaultdict(list)
+        for pk, name in rows.values_list('pk', field_name).iterator():
+            pks_by_name[name].append(pk)
+        names = iter(pks_by_name)
+
+        def batches():
+            while batch := list(islice(names, options['batch_size'])):
+                yield batch
+
+        batches = batches()
+        measured = unreadable = 0
+        # Keep a couple of batches per worker in flight so memory stays bounded
+        pending = deque(pool.submit(measure_stored_batch, batch) for batch in islice(batches, options['workers'] * 2))
+        while pending:
+            results = pending.popleft().result()
+            for batch in islice(batches, 1):
+                pending.append(pool.submit(measure_stored_batch, batch))
+
+            updates = []
+            for name, values in results:
+                if values is None:
+                    unreadable += len(pks_by_name[name])
+                    continue
+                updates += [model(pk=pk, **dict(zip(fields, values))) for pk in pks_by_name[name]]
+            # bulk_update skips save(), so updated_at (and sitemap lastmod) stay untouched
+            model.objects.bulk_update(updates, fields)
+            measured += len(updates)
+        return measured, unreadable
@@ -0,0 +1,84 @@
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'sqlite': 'core.cache_backends.SQLiteCache',
+}
+
+
+def make_cache(name, directory):
+    location = {'locmem': 'benchmark', 'file': str(Path(directory) / 'file'), 'sqlite': str(Path(directory) / 'shared.sqlite3')}[name]
+    return import_string(BACKENDS[name])(location, {'TIMEOUT': 300, 'OPTIONS': {'MAX_ENTRIES': 1_000_000}})
+
+
+def _timed(operation, count):
+    started = time.perf_counter()
+    for i in range(count):
+        operation(i)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def _read_worker(args):
+    # Runs in a child process: a fresh backend instance on the same location
+    name, directory, keys, count = args
+    cache = make_cache(name, directory)
+    started = time.perf_counter()
+    hits = sum(cache.get(f'key{i % keys}') is not None for i in range(count))
+    return hits, time.perf_counter() - started
+
+
+def _write_in_child(name, directory):
+    make_cache(name, directory).set('written-by-child', 1)
+
+
+class Command(BaseCommand):
+    help = 'Compare the shared SQLite cache with LocMemCache and FileBasedCache: per-operation latency, multi-process reads and cross-process visibility'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ops', type=int, default=2000, help='Operations per measurement')
+        parser.add_argument('--keys', type=int, default=1000, help='Distinct keys')
+        parser.add_argument('--workers', type=int, default=4, help='Reader processes')
+
+    def handle(self, *args, **options):
+        ops, keys, workers = options['ops'], options['keys'], options['workers']
+        value = {'title': 'A cached post card', 'ids': list(range(20))}
+        context = multiprocessing.get_context('fork')
+
+        self.stdout.write(f'{"backend":<8}{"get hit":>9}{"get miss":>10}{"set":>8}{"add":>8}{"incr":>8}   µs per operation')
+        with tempfile.TemporaryDirectory() as directory:
+            for name in BACKENDS:
+                cache = make_cache(name, directory)
+                cache.set_many({f'key{i}': value for i in range(keys)})
+                cache.set('counter', 0)
+                timings = [
+                    _timed(lambda i: cache.get(f'key{i % keys}'), ops),
+                    _timed(lambda i: cache.get(f'missing{i}'), ops),
+                    _timed(lambda i: cache.set(f'key{i % keys}', value), ops),
+                    _timed(lambda i: cache.add(f'lock{i}', 1), ops),
+                    _timed(lambda i: cache.incr('counter'), ops),
+                ]
+                self.stdout.write(f'{name:<8}' + ''.join(f'{timing:>{width}.1f}' for timing, width in zip(timings, (9, 10, 8, 8, 8))))
+
+            self.stdout.write(f'\n{"backend":<8}{"shared":>8}{"reads/s with " + str(workers) + " processes":>30}')
+            for name in BACKENDS:
+                cache = make_cache(name, directory)
+                cache.clear()
+                # Written by another process: visible here only if the cache is shared
+                with context.Pool(1) as pool:
+                    pool.apply(_write_in_child, (name, directory))
+                shared = cache.get('written-by-child') is not None
+
+                make_cache(name, directory).set_many({f'key{i}': value for i in range(keys)})
+                with context.Pool(workers) as pool:
+                    results = pool.map(_read_worker, [(name, directory, keys, ops)] * workers)
+                reads = workers * ops / max(seconds for _, seconds in results)
+                self.stdout.write(f'{name:<8}{"yes" if shared else "no":>8}{reads:>30,.0f}')
+            self.stdout.write('(LocMemCache readers each start with an empty cache of their own, so they only see misses)')
@@ -0,0 +1,90 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.urls import reverse
+
+from core.models import Like, Post, Tag
+
+
+PARTIALS = ['core/partials/like_button.html', 'core/partials/post_card.html']
+
+
+def jinja2_engine():
+    """The JINJA2_PARTIALS engine, configured or not; None without the Jinja2 package"""
+    try:
+        from django.template.backends.jinja2 import Jinja2
+    except ImportError:
+        return None
+    if settings.JINJA2_PARTIALS:
+        return engines['jinja2']
+    return Jinja2({'NAME': 'jinja2', 'DIRS': [], 'APP_DIRS': True, 'OPTIONS': {'environment': 'core.jinja_env.environment'}})
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the hot partials (like button, post card) rendered by the Django '
+        'template engine, without and with the cached loader, and by Jinja2'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20, help='Posts rendered per run, like a listing page')
+        parser.add_argument('--repeat', type=int, default=50, help='Timed runs per partial and engine')
+
+    def handle(self, *args, **options):
+        django_options = {**settings.TEMPLATES[0]['OPTIONS']}
+        django_options.pop('loaders')
+        uncached = DjangoTemplates({
+            'NAME': 'django-uncached', 'DIRS': [], 'APP_DIRS': False,
+            'OPTIONS': {**django_options, 'loaders': [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]},
+        })
+        candidates = [('django, no cache', uncached), ('django, cached', engines['django']), ('jinja2', jinja2_engine())]
+
+        # Rendering touches the database (likes, tags), so use a throwaway copy
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            request, posts = self.seed(options['posts'])
+            self.stdout.write(f'{"partial":<34}{"engine":<18}{"median ms":>10}{"per post µs":>13}')
+            for template_name in PARTIALS:
+                for label, engine in candidates:
+                    if engine is None:
+                        self.stdout.write(f'{template_name:<34}{label:<18}{"(Jinja2 is not installed)":>23}')
+                        continue
+                    timings = self.measure(engine, template_name, request, posts, options['repeat'])
+                    median = statistics.median(timings)
+                    self.stdout.write(f'{template_name:<34}{label:<18}{median * 1000:>10.2f}{median / len(posts) * 1e6:>13.1f}')
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self, count):
+        user = User.objects.create_user('benchmark')
+        tags = Tag.objects.bulk_create(Tag(name=f'tag{i}') for i in range(3))
+        for i in range(count):
+            post = Post.objects.create(title=f'Post {i}', content='Benchmark post', author=user, excerpt='An excerpt ' * 10)
+            post.tags.set(tags)
+            Like.objects.create(user=user, post=post)
+
+        request = RequestFactory().get(reverse('all posts'))
+        request.user = user
+        # Likes are prefetched so the timings are rendering, not queries
+        posts = list(Post.objects.for_cards().prefetch_related('likes').order_by('pk'))
+        return request, posts
+
+    def measure(self, engine, template_name, request, posts, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for post in posts:
+                # Looked up per render like render_to_string does; without the cached loader that means parsing again
+                engine.get_template(template_name).render({'post': post, 'user': request.user}, request)
+            timings.append(time.perf_counter() - started)
+        return timings
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.critical_css import CRITICAL_PAGES, build_critical_css
+
+
+class Command(BaseCommand):
+    help = 'Extract per-page critical CSS from static/css/output.css and print a size report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('pages', nargs='*', help=f"Pages to build (default: {', '.join(CRITICAL_PAGES)})")
+
+    def handle(self, *args, **options):
+        pages = {name: CRITICAL_PAGES[name] for name in options['pages']} if options['pages'] else CRITICAL_PAGES
+        report = build_critical_css(pages)
+
+        full, full_gzip = report['stylesheet_bytes'], report['stylesheet_gzip_bytes']
+        self.stdout.write(f"{report['stylesheet']}: {full:,} bytes ({full_gzip:,} gzipped), deferred")
+        self.stdout.write(f"{'page':<14}{'critical':>12}{'gzipped':>12}{'of full':>10}")
+        for page, sizes in report['pages'].items():
+            share = sizes['critical_bytes'] / full * 100 if full else 0
+            self.stdout.write(
+                f"{page:<14}{sizes['critical_bytes']:>12,}{sizes['critical_gzip_bytes']:>12,}{share:>9.1f}%"
+            )
+        over = [page for page, sizes in report['pages'].items() if sizes['critical_gzip_bytes'] > settings.CRITICAL_CSS_BUDGET_BYTES]
+        if over:
+            raise CommandError(
+                f"Critical CSS over CRITICAL_CSS_BUDGET_BYTES ({settings.CRITICAL_CSS_BUDGET_BYTES:,} gzipped) for "
+                f"{', '.join(over)}: move their {{# below the fold #}} marker up"
+            )
+        self.stdout.write(self.style.SUCCESS(f'Wrote critical CSS for {len(report["pages"])} page(s)'))
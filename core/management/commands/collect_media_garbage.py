@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.media import ENCODINGS
+from core.models import MediaBlob
+from core.storage import BLOB_DIR, INCOMING_DIR, LOCK_NAME, blob_lock, count_references
+
+VARIANT_SUFFIXES = tuple(suffix for _, suffix in ENCODINGS)
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete media blobs that no post, project or profile has referenced for '
+        'MEDIA_BLOB_GRACE_HOURS, and abandoned upload files'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=int, default=settings.MEDIA_BLOB_GRACE_HOURS, help='Keep unreferenced blobs this recent')
+        parser.add_argument('--recount', action='store_true', help='Recompute every reference count from the media fields first')
+        parser.add_argument('--dry-run', action='store_true', help='Only list what would be deleted')
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        counts = count_references()
+        if options['recount']:
+            self.stdout.write(f'{self.recount(counts)} reference count(s) corrected')
+        collected = self.collect(cutoff)
+        swept = self.sweep(cutoff, counts)
+        verb = 'Would delete' if self.dry_run else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {collected} unreferenced blob(s) and {swept} stray file(s)'))
+
+    def recount(self, counts):
+        blobs = []
+        for blob in MediaBlob.objects.only('name', 'references').iterator():
+            if blob.references != counts[blob.name]:
+                blob.references = counts[blob.name]
+                blobs.append(blob)
+        if not self.dry_run:
+            MediaBlob.objects.bulk_update(blobs, ['references'], batch_size=500)
+        return len(blobs)
+
+    def collect(self, cutoff):
+        collected = 0
+        candidates = MediaBlob.objects.filter(references=0, uploaded_at__lt=cutoff).values_list('pk', 'name')
+        for pk, name in candidates.iterator():
+            if not self.dry_run:
+                # Uploads of the same bytes wait, and then store the blob again
+                with blob_lock(default_storage):
+                    # Skipped if it was referenced or uploaded again since the query
+                    deleted, _ = MediaBlob.objects.filter(pk=pk, references=0, uploaded_at__lt=cutoff).delete()
+                    if deleted:
+                        self.delete_file(name)
+                if not deleted:
+                    continue
+            collected += 1
+            self.stdout.write(f'  {name}')
+        return collected
+
+    def sweep(self, cutoff, counts):
+        """Files under blobs/ with no row: interrupted uploads, or rows lost after the file was written"""
+        root = Path(settings.MEDIA_ROOT)
+        known = set(MediaBlob.objects.values_list('name', flat=True))
+        swept = 0
+        for path in sorted((root / BLOB_DIR).rglob('*')):
+            name = path.relative_to(root).as_posix()
+            if not path.is_file() or name.endswith(VARIANT_SUFFIXES) or name in known or name == LOCK_NAME:
+                continue
+            stat = path.stat()
+            if datetime.fromtimestamp(stat.st_mtime, dt_timezone.utc) >= cutoff:
+                continue
+            if counts[name] and not name.startswith(INCOMING_DIR):
+                # Still referenced: adopt it instead
+                if not self.dry_run:
+                    MediaBlob.objects.create(name=name, size=stat.st_size, references=counts[name], uploaded_at=timezone.now())
+                continue
+            if not self.dry_run:
+                with blob_lock(default_storage):
+                    # An upload may have stored it (and created its row) since the scan
+                    if MediaBlob.objects.filter(name=name).exists():
+                        continue
+                    self.delete_file(name)
+            swept += 1
+            self.stdout.write(f'  {name}')
+        return swept
+
+    def delete_file(self, name):
+        default_storage.delete(name)
+        for suffix in VARIANT_SUFFIXES:
+            default_storage.delete(name + suffix)
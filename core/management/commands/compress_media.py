@@ -0,0 +1,22 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.media import is_compressible, precompress
+
+
+class Command(BaseCommand):
+    help = 'Write precompressed (.gz/.br) variants of compressible files under MEDIA_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rewrite variants that are already up to date')
+
+    def handle(self, *args, **options):
+        written = 0
+        for path in Path(settings.MEDIA_ROOT).rglob('*'):
+            if path.is_file() and is_compressible(path.name):
+                for variant in precompress(path, force=options['force']):
+                    written += 1
+                    self.stdout.write(f'  {variant.relative_to(settings.MEDIA_ROOT)}')
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} precompressed variant(s)'))
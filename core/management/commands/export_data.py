@@ -0,0 +1,39 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.exports import EXPORTS, FORMATS, export_chunks
+
+
+class Command(BaseCommand):
+    help = 'Stream contact messages or posts as CSV or JSON Lines to a file or stdout, in constant memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('export', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output while writing it')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+        parser.add_argument('--status', action='append', help='Only contact messages with this status (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=settings.EXPORT_CHUNK_SIZE, help='Rows per query')
+
+    def handle(self, *args, **options):
+        model, fields = EXPORTS[options['export']]
+        queryset = model.objects.all()
+        if options['status'] and options['export'] == 'contact':
+            queryset = queryset.filter(status__in=options['status'])
+
+        chunks = export_chunks(queryset, fields, options['format'], options['gzip'], options['chunk_size'])
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        written = 0
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['output']:
+                output.close()
+            else:
+                output.flush()
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f'Wrote {written:,} bytes to {options["output"]}'))
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.startup import measure_boot, package_totals
+
+
+class Command(BaseCommand):
+    help = 'Boot the project in a fresh interpreter and report import time per module and package (python -X importtime)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=25, help='Rows per table')
+        parser.add_argument('--project-only', action='store_true', help='Only list modules of this project')
+
+    def handle(self, *args, **options):
+        seconds, loaded, records = measure_boot(importtime=True)
+        if options['project_only']:
+            records = [record for record in records if record[0].partition('.')[0] in ('core', 'cabrelblog')]
+
+        self.stdout.write(f'Boot (django.setup() + URLconf): {seconds * 1000:.0f} ms, {len(records)} module(s) imported\n')
+
+        self.stdout.write(f'{"cumulative ms":>14}{"self ms":>9}  module')
+        for module, self_us, cumulative_us, depth in sorted(records, key=lambda record: record[2], reverse=True)[:options['limit']]:
+            self.stdout.write(f'{cumulative_us / 1000:>14.1f}{self_us / 1000:>9.1f}  {module}')
+
+        self.stdout.write(f'\n{"self ms":>14}  package')
+        for package, self_us in package_totals(records)[:options['limit']]:
+            self.stdout.write(f'{self_us / 1000:>14.1f}  {package}')
+
+        budget = settings.BOOT_TIME_BUDGET_MS
+        if loaded:
+            self.stdout.write(self.style.WARNING(f'\nLoaded at boot but meant to be lazy: {", ".join(loaded)}'))
+        if seconds * 1000 > budget:
+            self.stdout.write(self.style.WARNING(f'Boot took longer than BOOT_TIME_BUDGET_MS ({budget} ms)'))
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import ContactMessage
+from core.moderation import purge_messages
+
+
+class Command(BaseCommand):
+    help = 'Delete contact messages archived longer than CONTACT_ARCHIVE_RETENTION_DAYS, in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.CONTACT_ARCHIVE_RETENTION_DAYS, help='Retention in days')
+        parser.add_argument('--spam', action='store_true', help='Also delete spam older than the retention period')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--sleep', type=float, default=0.1, help='Seconds to pause between batches')
+
+    def handle(self, *args, **options):
+        older_than = timezone.now() - timedelta(days=options['days'])
+        statuses = ('archived', 'spam') if options['spam'] else ('archived',)
+        deleted = 0
+        for deleted in purge_messages(
+            ContactMessage, older_than, statuses,
+            batch_size=options['batch_size'], pause=options['sleep'],
+        ):
+            self.stdout.write(f'  {deleted} message(s) deleted')
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} message(s) older than {options["days"]} day(s)'))
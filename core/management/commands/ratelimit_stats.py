@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.ratelimit import throttled_counts
+
+
+class Command(BaseCommand):
+    help = 'Show configured rate limits and how many requests each one has throttled'
+
+    def handle(self, *args, **options):
+        counts = throttled_counts()
+        self.stdout.write(f"{'scope':<12}{'limit':>10}{'throttled':>12}")
+        for scope, rate in settings.RATELIMITS.items():
+            self.stdout.write(f'{scope:<12}{rate:>10}{counts[scope]:>12}')
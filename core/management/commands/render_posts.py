@@ -0,0 +1,52 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from core.models import Post, invalidate_posts
+from core.rendering import RENDERED_POST_FIELDS, render_post_batch
+
+
+class Command(BaseCommand):
+    help = 'Re-render the cached Markdown HTML, excerpt and reading time of every post'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Rendering processes')
+        parser.add_argument('--batch-size', type=int, default=200, help='Posts per worker task and per UPDATE')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        def read_batches():
+            # Keyset pagination instead of a long-lived cursor, since rows are updated while reading
+            last_pk = 0
+            while True:
+                batch = list(
+                    Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                    .values_list('pk', 'content')[:batch_size]
+                )
+                if not batch:
+                    return
+                last_pk = batch[-1][0]
+                yield batch
+
+        batches = read_batches()
+
+        rendered = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            # Keep a couple of batches per worker in flight so memory stays bounded
+            pending = deque(pool.submit(render_post_batch, batch) for batch in islice(batches, options['workers'] * 2))
+            while pending:
+                results = pending.popleft().result()
+                for batch in islice(batches, 1):
+                    pending.append(pool.submit(render_post_batch, batch))
+
+                # bulk_update skips save(), so updated_at (and sitemap lastmod) stay untouched
+                Post.objects.bulk_update([Post(pk=pk, **fields) for pk, fields in results], RENDERED_POST_FIELDS)
+                rendered += len(results)
+                self.stdout.write(f'  {rendered} post(s) rendered')
+
+        invalidate_posts()
+        self.stdout.write(self.style.SUCCESS(f'Re-rendered {rendered} post(s)'))
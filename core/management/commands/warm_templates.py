@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.templating import warm_templates
+
+
+class Command(BaseCommand):
+    help = 'Compile every template of the core app with each configured engine; fails on syntax errors'
+
+    def handle(self, *args, **options):
+        compiled, errors, seconds = warm_templates()
+        for alias, name, exc in errors:
+            self.stderr.write(f'{name} ({alias}): {exc}')
+        if errors:
+            raise CommandError(f'{len(errors)} template(s) failed to compile')
+        self.stdout.write(self.style.SUCCESS(f'Compiled {compiled} template(s) in {seconds * 1000:.0f} ms'))
@@ -0,0 +1,177 @@
+import gzip
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+
+try:
+    import brotli
+except ImportError:  # Brotli variants are optional
+    brotli = None
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Blobs (core.storage) are named "<sha256>.ext"; uploads from before them "name.<12 hex chars>.ext"
+HASHED_NAME_RE = re.compile(r'(?:^[0-9a-f]{64}|\.[0-9a-f]{12})\.[^./]+$')
+STREAM_CHUNK_SIZE = 64 * 1024
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+# (Accept-Encoding token, file suffix), most preferred first
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+# Precompressed variants
+
+def is_compressible(name):
+    return Path(name).suffix.lower() in settings.MEDIA_PRECOMPRESS_EXTENSIONS
+
+
+def precompress(path, force=False):
+    """Write .gz (and .br when brotli is installed) next to a media file; return the written paths"""
+    path = Path(path)
+    data = None
+    written = []
+    for encoding, suffix in ENCODINGS:
+        if encoding == 'br' and brotli is None:
+            continue
+        variant = path.with_name(path.name + suffix)
+        if not force and variant.exists() and variant.stat().st_mtime >= path.stat().st_mtime:
+            continue
+        if data is None:
+            data = path.read_bytes()
+        compressed = brotli.compress(data) if encoding == 'br' else gzip.compress(data, mtime=0)
+        # A variant that isn't smaller is never worth serving
+        if len(compressed) >= len(data):
+            variant.unlink(missing_ok=True)
+            continue
+        variant.write_bytes(compressed)
+        written.append(variant)
+    return written
+
+
+def _accepted_variant(request, fullpath):
+    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    for encoding, suffix in ENCODINGS:
+        if encoding in accept_encoding:
+            variant = fullpath.with_name(fullpath.name + suffix)
+            if variant.is_file():
+                return encoding, variant
+    return None, fullpath
+
+
+# Byte ranges
+
+def parse_range(header, size):
+    """
+    Return (start, end) for a single byte range, or None when the whole file
+    should be sent. Raise ValueError for an unsatisfiable range.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # Multiple or malformed ranges: serving the full body is always allowed
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        # Invalid rather than unsatisfiable (RFC 9110 14.2): ignored
+        return None
+    if start >= size:
+        raise ValueError('Range not satisfiable')
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+def _range_is_current(request, etag, last_modified):
+    # If-Range: only honour Range when the client's copy is still current
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _iter_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+# Serving
+
+def serve(request, path):
+    """
+    Serve an uploaded file from MEDIA_ROOT with validators, byte ranges,
+    precompressed variants and long-lived caching for content-hashed names.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404('Invalid media path')
+    if not fullpath.is_file():
+        raise Http404('Media file not found')
+
+    content_type, _ = mimetypes.guess_type(str(fullpath))
+    content_type = content_type or 'application/octet-stream'
+    range_header = request.META.get('HTTP_RANGE')
+
+    encoding, served_path = (None, fullpath) if range_header else _accepted_variant(request, fullpath)
+    stat = served_path.stat()
+    last_modified = int(stat.st_mtime)
+    etag = f'"{stat.st_size:x}-{last_modified:x}{"-" + encoding if encoding else ""}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        if settings.MEDIA_ACCEL_REDIRECT:
+            # Hand the transfer to the front-end server (nginx X-Accel-Redirect)
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT + str(served_path.relative_to(settings.MEDIA_ROOT))
+        elif range_header and _range_is_current(request, etag, last_modified):
+            try:
+                byte_range = parse_range(range_header, stat.st_size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{stat.st_size}'
+                return response
+            if byte_range is not None:
+                start, end = byte_range
+                length = end - start + 1
+                response = StreamingHttpResponse(_iter_range(served_path, start, length), status=206, content_type=content_type)
+                response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+                response['Content-Length'] = str(length)
+        if response is None:
+            # FileResponse uses wsgi.file_wrapper, which gunicorn turns into sendfile()
+            response = FileResponse(open(served_path, 'rb'), content_type=content_type, filename=fullpath.name)
+        response['Last-Modified'] = http_date(last_modified)
+        response['Accept-Ranges'] = 'bytes'
+        if encoding:
+            response['Content-Encoding'] = encoding
+
+    response['ETag'] = etag
+    if is_compressible(fullpath.name):
+        patch_vary_headers(response, ['Accept-Encoding'])
+    if HASHED_NAME_RE.search(fullpath.name):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_MAX_AGE)
+    return response
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.3 on 2026-10-19 02:23
+
+from django.db import migrations, models
+
+
+RENDERED_FIELDS = ['content_html', 'toc_html', 'excerpt', 'reading_minutes']
+
+
+def render_existing_posts(apps, schema_editor):
+    from core.rendering import render_post_fields
+
+    Post = apps.get_model('core', 'Post')
+    batch = []
+    for post in Post.objects.only('pk', 'content').iterator(chunk_size=500):
+        for field, value in render_post_fields(post.content).items():
+            setattr(post, field, value)
+        batch.append(post)
+        if len(batch) == 500:
+            Post.objects.bulk_update(batch, RENDERED_FIELDS)
+            batch = []
+    Post.objects.bulk_update(batch, RENDERED_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_alter_post_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reading_minutes',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='toc_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='content',
+            field=models.TextField(help_text='Markdown'),
+        ),
+        migrations.RunPython(render_existing_posts, migrations.RunPython.noop),
+    ]
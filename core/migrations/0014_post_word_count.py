@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-19 02:25
+
+from django.db import migrations, models
+
+
+def count_words(apps, schema_editor):
+    from core.rendering import render_post_fields
+
+    Post = apps.get_model('core', 'Post')
+    batch = []
+    for post in Post.objects.only('pk', 'content').iterator(chunk_size=500):
+        post.word_count = render_post_fields(post.content)['word_count']
+        batch.append(post)
+        if len(batch) == 500:
+            Post.objects.bulk_update(batch, ['word_count'])
+            batch = []
+    Post.objects.bulk_update(batch, ['word_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_post_rendered_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_words, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.3 on 2026-10-19 02:40
+
+from django.db import migrations, models
+
+
+def fingerprint_messages(apps, schema_editor):
+    from core.moderation import content_hash, sender_hash
+
+    ContactMessage = apps.get_model('core', 'ContactMessage')
+    batch = []
+    for message in ContactMessage.objects.only('pk', 'email', 'message').iterator(chunk_size=500):
+        message.sender_hash = sender_hash(message.email)
+        message.content_hash = content_hash(message.message)
+        batch.append(message)
+        if len(batch) == 500:
+            ContactMessage.objects.bulk_update(batch, ['sender_hash', 'content_hash'])
+            batch = []
+    ContactMessage.objects.bulk_update(batch, ['sender_hash', 'content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_created_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactmessage',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='contactmessage',
+            name='sender_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='contactmessage',
+            name='spam_score',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='contactmessage',
+            name='status',
+            field=models.CharField(choices=[('new', 'New'), ('read', 'Read'), ('replied', 'Replied'), ('archived', 'Archived'), ('spam', 'Spam')], default='new', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['status', 'created_at'], name='contact_status_created_idx'),
+        ),
+        migrations.RunPython(fingerprint_messages, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,12 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from PIL import Image
 import os
+from io import BytesIO
+from django.core.files.base import ContentFile
+from .caching import bump_generation_on_commit
 # from django.utils import timezone
 
 
@@ -23,29 +26,89 @@ class Tag(models.Model):
         return str(self.name)
     
 
+class PostQuerySet(models.QuerySet):
+    # Columns only the detail page needs
+    BODY_FIELDS = ('content', 'content_html', 'toc_html')
+
+    def for_cards(self):
+        """Posts for listing cards: no bodies, author and tags fetched up front"""
+        return self.defer(*self.BODY_FIELDS).select_related('author').prefetch_related('tags')
+
+
 class Post(models.Model):
     title = models.CharField(max_length=100)
-    content = models.TextField()
+    content = models.TextField(help_text="Markdown")
     image = models.ImageField(upload_to='post_images/', blank=True, null=True)
+    # Filled from image when it is uploaded (see core.images)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_color = models.CharField(max_length=7, blank=True, editable=False)
+    image_lqip = models.TextField(blank=True, editable=False)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     category = models.ManyToManyField(Category, blank = True)
     tags = models.ManyToManyField(Tag, blank = True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Derived from content on save (see core.rendering)
+    content_html = models.TextField(blank=True, editable=False)
+    toc_html = models.TextField(blank=True, editable=False)
+    excerpt = models.CharField(max_length=300, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_minutes = models.PositiveSmallIntegerField(default=1, editable=False)
+
+    # Written back in batches by core.counters
+    view_count = models.PositiveIntegerField(default=0, editable=False)
+    trending_score = models.FloatField(null=True, blank=True, editable=False, db_index=True)
+
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         get_latest_by = 'created_at'
 
 
     def __str__(self):
         return str(self.title)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored Markdown so save() can tell whether it changed
+        instance._loaded_content = instance.__dict__.get('content')
+        return instance
+
+    def content_changed(self):
+        if 'content' in self.get_deferred_fields():
+            return False
+        return self._state.adding or self.content != getattr(self, '_loaded_content', None)
+
+    def render_content(self):
+        """Recompute content_html, toc_html and the listing card fields from content"""
+        from .rendering import render_post_fields
+        for field, value in render_post_fields(self.content).items():
+            setattr(self, field, value)
+        self._loaded_content = self.content
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.content_changed() and (update_fields is None or 'content' in update_fields):
+            self.render_content()
+            if update_fields is not None:
+                from .rendering import RENDERED_POST_FIELDS
+                kwargs['update_fields'] = {*update_fields, *RENDERED_POST_FIELDS}
+        if update_fields is None or 'image' in update_fields:
+            from .images import refresh_placeholder
+            changed = refresh_placeholder(self, 'image')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], *changed}
+        super().save(*args, **kwargs)
     
 
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
 
     def __str__(self):
@@ -56,7 +119,7 @@ class Comment(models.Model):
 class Like(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='likes')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    created_at = models.DateTimeField(auto_now_add = True)
+    created_at = models.DateTimeField(auto_now_add = True, db_index=True)
 
     class Meta:
         unique_together = ('post', 'user') #prevents multiple likes
@@ -111,6 +174,11 @@ class Portfolio(models.Model):
     
     # Images
     featured_image = models.ImageField(upload_to='portfolio/featured/', blank=True, null=True)
+    # Filled from featured_image when it is uploaded (see core.images)
+    featured_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    featured_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    featured_image_color = models.CharField(max_length=7, blank=True, editable=False)
+    featured_image_lqip = models.TextField(blank=True, editable=False)
     gallery_images = models.TextField(blank=True, help_text="Comma-separated image URLs or paths")
     
     # Links
@@ -206,6 +274,12 @@ class Portfolio(models.Model):
                 slug = f"{base_slug}-{counter}"
                 counter += 1
             self.slug = slug
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'featured_image' in update_fields:
+            from .images import refresh_placeholder
+            changed = refresh_placeholder(self, 'featured_image')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *changed}
         super().save(*args, **kwargs)
 
 
@@ -217,6 +291,7 @@ class ContactMessage(models.Model):
         ('read', 'Read'),
         ('replied', 'Replied'),
         ('archived', 'Archived'),
+        ('spam', 'Spam'),
     ]
     
     name = models.CharField(max_length=200)
@@ -227,14 +302,42 @@ class ContactMessage(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='new')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    # Set on insert (see core.moderation)
+    sender_hash = models.CharField(max_length=64, blank=True, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+    spam_score = models.PositiveSmallIntegerField(default=0, editable=False)
     
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Contact Message"
         verbose_name_plural = "Contact Messages"
+        indexes = [
+            # Admin changelist filtered by status, newest first
+            models.Index(fields=['status', 'created_at'], name='contact_status_created_idx'),
+            # purge_messages batches, by status and last change
+            models.Index(fields=['status', 'updated_at'], name='contact_status_updated_idx'),
+            # Recent duplicates looked up by spam_score on every contact POST
+            models.Index(fields=['content_hash', 'created_at'], name='contact_content_created_idx'),
+            models.Index(fields=['sender_hash', 'created_at'], name='contact_sender_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.subject}"
+
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            from .moderation import content_hash, sender_hash, spam_score
+            self.sender_hash = sender_hash(self.email)
+            self.content_hash = content_hash(self.message)
+            self.spam_score = spam_score(self)
+            if self.spam_score >= settings.CONTACT_SPAM_THRESHOLD:
+                self.status = 'spam'
+        super().save(*args, **kwargs)
+
+    @property
+    def is_spam(self):
+        return self.status == 'spam'
     
     def get_status_badge_class(self):
         """Return CSS class for status badge"""
@@ -243,6 +346,7 @@ class ContactMessage(models.Model):
             'read': 'bg-yellow-100 text-yellow-800',
             'replied': 'bg-green-100 text-green-800',
             'archived': 'bg-gray-100 text-gray-800',
+            'spam': 'bg-red-100 text-red-800',
         }
         return status_classes.get(self.status, 'bg-gray-100 text-gray-800')
     
@@ -252,6 +356,11 @@ class ContactMessage(models.Model):
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     image = models.ImageField(default='profile_pics/default.jpg', upload_to='profile_pics/', blank=True, null=True)
+    # Filled from image when it is uploaded (see core.images)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_color = models.CharField(max_length=7, blank=True, editable=False)
+    image_lqip = models.TextField(blank=True, editable=False)
     bio = models.TextField(max_length=500, blank=True, help_text="Tell us about yourself")
     
     # Contact Details
@@ -270,15 +379,46 @@ class Profile(models.Model):
         return f"{self.user.username}'s Profile"
     
     def save(self, *args, **kwargs):
+        uploaded = bool(self.image) and not self.image._committed
+        if uploaded:
+            self.shrink_image()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'image' in update_fields:
+            from .images import refresh_placeholder
+            changed = refresh_placeholder(self, 'image', force=uploaded)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *changed}
         super().save(*args, **kwargs)
-        
-        # Resize image to save space (only if image exists)
-        if self.image and os.path.exists(self.image.path):
-            img = Image.open(self.image.path)
-            if img.height > 300 or img.width > 300:
-                output_size = (300, 300)
-                img.thumbnail(output_size)
-                img.save(self.image.path)
+
+    def shrink_image(self):
+        """
+        Store a newly uploaded picture at most 300x300 to save space. Stored
+        files are shared by content, so they are never resized in place.
+        """
+        from PIL import Image  # Only profile uploads pay for importing Pillow
+        with Image.open(self.image) as img:
+            if img.height <= 300 and img.width <= 300:
+                self.image.seek(0)
+                return
+            image_format = img.format
+            img.thumbnail((300, 300))
+            buffer = BytesIO()
+            img.save(buffer, image_format)
+        self.image.save(os.path.basename(self.image.name), ContentFile(buffer.getvalue()), save=False)
+
+
+class MediaBlob(models.Model):
+    """An uploaded file, stored once under its content hash (see core.storage)"""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    # Media fields pointing at this blob, kept up to date by the receivers below
+    references = models.PositiveIntegerField(default=0, db_index=True)
+    # Last time these bytes were uploaded; recent blobs are never collected
+    uploaded_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.name
+
 
 # Create profile automatically when user is created
 @receiver(post_save, sender=User)
@@ -291,4 +431,97 @@ def save_user_profile(sender, instance, **kwargs):
     if hasattr(instance, 'profile'):
         instance.profile.save()
     else:
-        Profile.objects.create(user=instance)
\ No newline at end of file
+        Profile.objects.create(user=instance)
+
+
+# Cache namespaces holding rendered posts: feed documents and post listings
+POST_NAMESPACES = ('feeds', 'posts')
+
+
+def invalidate_posts(using=None):
+    """Regenerate everything showing posts; also for bulk updates that skip the signals"""
+    for namespace in POST_NAMESPACES:
+        bump_generation_on_commit(namespace, using)
+
+
+# Regenerate cached feed documents and post listings when posts change
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(m2m_changed, sender=Post.tags.through)
+def invalidate_post_feeds(sender, action=None, using=None, **kwargs):
+    if action is not None and not action.startswith('post_'):
+        return
+    invalidate_posts(using)
+
+
+# Recompute the About page portfolio stats when a project changes
+@receiver(post_save, sender=Portfolio)
+@receiver(post_delete, sender=Portfolio)
+def invalidate_portfolio_summary(sender, using=None, **kwargs):
+    bump_generation_on_commit('portfolio', using)
+
+
+# Regenerate only the sitemap shard that contains the changed object
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Portfolio)
+@receiver(post_delete, sender=Portfolio)
+def invalidate_sitemap_shard(sender, instance, using=None, **kwargs):
+    from .sitemaps import shard_for_pk, shard_namespace
+    section = 'posts' if sender is Post else 'portfolio'
+    bump_generation_on_commit(shard_namespace(section, shard_for_pk(instance.pk)), using)
+    bump_generation_on_commit('sitemaps', using)
+
+
+# Liking or unliking changes the user's cached liked post ids
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def forget_user_likes(sender, instance, **kwargs):
+    from .likes import forget_liked_ids
+    forget_liked_ids(instance.user_id)
+
+
+# Rebuild the cached services list when a service changes
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def invalidate_services(sender, using=None, **kwargs):
+    bump_generation_on_commit('services', using)
+
+
+# Count references to media blobs, so unreferenced ones can be collected
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Portfolio)
+@receiver(pre_save, sender=Profile)
+def remember_stored_media(sender, instance, using, update_fields=None, **kwargs):
+    from .storage import MEDIA_FIELDS
+    fields = MEDIA_FIELDS[sender._meta.label]
+    if update_fields is not None and not set(fields) & set(update_fields):
+        instance._stored_media = None
+    elif instance._state.adding:
+        instance._stored_media = [''] * len(fields)
+    else:
+        stored = sender._base_manager.using(using).filter(pk=instance.pk).values_list(*fields).first()
+        instance._stored_media = [name or '' for name in stored] if stored else [''] * len(fields)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Portfolio)
+@receiver(post_save, sender=Profile)
+def count_media_references(sender, instance, **kwargs):
+    stored = getattr(instance, '_stored_media', None)
+    if stored is None:
+        return
+    from .storage import add_references, media_names, remove_references
+    for old, new in zip(stored, media_names(instance)):
+        if old != new:
+            add_references([new])
+            remove_references([old])
+    instance._stored_media = None
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Portfolio)
+@receiver(post_delete, sender=Profile)
+def release_media_references(sender, instance, **kwargs):
+    from .storage import media_names, remove_references
+    remove_references(media_names(instance))
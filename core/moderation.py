@@ -0,0 +1,73 @@
+import hashlib
+import re
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+URL_RE = re.compile(r'https?://', re.IGNORECASE)
+
+
+# Spam scoring
+
+def sender_hash(email):
+    return hashlib.sha256(email.strip().lower().encode('utf-8')).hexdigest()
+
+
+def content_hash(message):
+    # Case and whitespace changes don't make a copy-pasted message new
+    normalized = ' '.join(message.lower().split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def spam_score(message):
+    """
+    Cheap insert-time score for a new ContactMessage: two points per recent
+    message with the same text, one per recent message from the same
+    address and two for a message stuffed with links. Both lookups are
+    answered by one query on the indexed fingerprint columns.
+    """
+    since = timezone.now() - timedelta(hours=settings.CONTACT_SPAM_WINDOW_HOURS)
+    duplicates = type(message).objects.filter(
+        Q(content_hash=message.content_hash) | Q(sender_hash=message.sender_hash),
+        created_at__gte=since,
+    ).aggregate(
+        same_content=Count('pk', filter=Q(content_hash=message.content_hash)),
+        same_sender=Count('pk', filter=Q(sender_hash=message.sender_hash)),
+    )
+    score = 2 * duplicates['same_content'] + duplicates['same_sender']
+    if len(URL_RE.findall(message.message)) > settings.CONTACT_SPAM_MAX_LINKS:
+        score += 2
+    return score
+
+
+# Bulk moderation
+
+def set_status(queryset, status):
+    """Move every message in queryset to status with a single UPDATE"""
+    return queryset.exclude(status=status).update(status=status, updated_at=timezone.now())
+
+
+def purge_messages(model, older_than, statuses=('archived',), batch_size=1000, pause=0):
+    """
+    Delete messages in statuses last touched before older_than, batch_size
+    rows per DELETE so the table is never locked for long. Yield the
+    running total after each batch.
+    """
+    deleted = 0
+    while True:
+        ids = list(
+            model.objects.filter(status__in=statuses, updated_at__lt=older_than)
+            .order_by()
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        # ContactMessage has no relations or signals, so this is a single DELETE
+        deleted += model.objects.filter(pk__in=ids).delete()[0]
+        yield deleted
+        if pause:
+            time.sleep(pause)
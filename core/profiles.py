@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Like, Post
+
+
+PROFILE_LATEST_POSTS = 10
+
+
+def _count(queryset, author_lookup):
+    # Correlated COUNT(*) so the three totals don't multiply each other like joins would
+    counts = (
+        queryset.filter(**{author_lookup: OuterRef('pk')})
+        .order_by()
+        .values(author_lookup)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def profile_users():
+    """Users with their profile and post stats, fetched in a single query"""
+    latest = Post.objects.filter(author=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+    return User.objects.select_related('profile').annotate(
+        post_count=_count(Post.objects.all(), 'author'),
+        like_count=_count(Like.objects.all(), 'post__author'),
+        comment_count=_count(Comment.objects.all(), 'post__author'),
+        last_post_at=Subquery(latest),
+    )
+
+
+def get_profile_data(user, latest_posts=PROFILE_LATEST_POSTS):
+    """
+    Template context for a profile page: the user (from profile_users()),
+    their profile, post/like/comment totals and their newest posts.
+    """
+    if not hasattr(user, 'post_count'):
+        user = profile_users().get(pk=user.pk)
+    return {
+        'profile_user': user,
+        'profile': getattr(user, 'profile', None),
+        'stats': {
+            'posts': user.post_count,
+            'likes': user.like_count,
+            'comments': user.comment_count,
+            'last_post_at': user.last_post_at,
+        },
+        'latest_posts': Post.objects.for_cards().filter(author=user).order_by('-created_at')[:latest_posts],
+    }
@@ -0,0 +1,112 @@
+import logging
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'30/m' -> (30, 60)"""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0].lower()]
+
+
+def client_identity(request):
+    """Rate limit signed-in users by account and everybody else by IP"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    if settings.RATELIMIT_TRUST_X_FORWARDED_FOR:
+        forwarded = [addr.strip() for addr in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if addr.strip()]
+        proxies = settings.RATELIMIT_TRUSTED_PROXIES
+        if proxies and len(forwarded) >= proxies:
+            return 'ip:' + forwarded[-proxies]
+    return 'ip:' + request.META.get('REMOTE_ADDR', '')
+
+
+def consume(scope, identity, limit, period, now=None):
+    """
+    Count one request against the (scope, identity) limit of `limit` per
+    sliding `period` seconds.
+
+    Requests are counted per fixed window with a single atomic cache.incr(),
+    so concurrent workers never race on a read-modify-write. The previous
+    window's count is weighted by how much of it the sliding window still
+    covers, so a burst straddling a window boundary can't get through twice.
+    Return (allowed, retry_after_seconds).
+    """
+    now = time.time() if now is None else now
+    window, elapsed = divmod(now / period, 1)
+    prefix = f'ratelimit:{scope}:{identity}'
+    key = f'{prefix}:{int(window)}'
+    # Kept through the next window, which still counts part of it
+    cache.add(key, 0, 2 * period + 1)
+    try:
+        used = cache.incr(key)
+    except ValueError:
+        # The counter expired between add() and incr()
+        cache.set(key, 1, 2 * period + 1)
+        used = 1
+    previous = cache.get(f'{prefix}:{int(window) - 1}', 0)
+    allowed = previous * (1 - elapsed) + used <= limit
+    return allowed, _retry_after(limit, period, used, previous, elapsed)
+
+
+def _retry_after(limit, period, used, previous, elapsed):
+    """Seconds until one more request would fit in the sliding window"""
+    if used < limit and previous:
+        # Later in this window, once enough of the previous one has slid out
+        # to make room for the retry itself
+        wait = 1 - (limit - used - 1) / previous - elapsed
+    else:
+        # In the next window, once enough of this one has slid out
+        wait = 1 - elapsed + max(0, 1 - (limit - 1) / used)
+    return max(1, math.ceil(wait * period))
+
+
+def record_throttled(scope):
+    key = f'ratelimit:throttled:{scope}'
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def throttled_counts():
+    """Number of throttled requests per scope since the cache was last cleared"""
+    return {
+        scope: cache.get(f'ratelimit:throttled:{scope}', 0)
+        for scope in settings.RATELIMITS
+    }
+
+
+def ratelimit(scope, methods=('POST',)):
+    """
+    View decorator enforcing settings.RATELIMITS[scope] per user/IP.
+    Only requests using one of `methods` are counted.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            if settings.RATELIMIT_ENABLE and request.method in methods and scope in settings.RATELIMITS:
+                limit, period = parse_rate(settings.RATELIMITS[scope])
+                identity = client_identity(request)
+                allowed, retry_after = consume(scope, identity, limit, period)
+                if not allowed:
+                    record_throttled(scope)
+                    logger.warning('Rate limit %s exceeded by %s', scope, identity)
+                    response = HttpResponse('Too many requests. Please try again later.', status=429, content_type='text/plain')
+                    response['Retry-After'] = str(retry_after)
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapped
+    return decorator
@@ -0,0 +1,92 @@
+import math
+
+import markdown
+import nh3
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+from markdown.extensions.toc import slugify
+from pygments.token import STANDARD_TYPES
+
+
+WORDS_PER_MINUTE = 200
+EXCERPT_WORDS = 40
+EXCERPT_MAX_LENGTH = 300
+
+RENDERED_POST_FIELDS = ['content_html', 'toc_html', 'excerpt', 'word_count', 'reading_minutes']
+
+# Heading ids get this prefix and no other id survives sanitizing, so a post
+# cannot claim the ids the page's scripts and HTMX swaps target
+TOC_ID_PREFIX = 'toc-'
+
+
+def toc_slugify(value, separator):
+    return TOC_ID_PREFIX + slugify(value, separator)
+
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'codehilite', 'toc', 'tables', 'sane_lists', 'nl2br']
+MARKDOWN_EXTENSION_CONFIGS = {
+    # Pygments classes; the matching styles live in static/css/highlight.css
+    'codehilite': {'css_class': 'highlight', 'guess_lang': False},
+    'toc': {'permalink': True, 'slugify': toc_slugify},
+}
+
+# Everything Markdown and Pygments emit, and nothing a post author could use for script injection
+ALLOWED_TAGS = nh3.ALLOWED_TAGS | {'div', 'span', 'pre', 'code', 'hr', 'br', 'img', 'table', 'thead', 'tbody', 'tr', 'th', 'td'}
+ALLOWED_ATTRIBUTES = {
+    **nh3.ALLOWED_ATTRIBUTES,
+    '*': {'id', 'title'},
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'th': {'align'},
+    'td': {'align'},
+}
+# Only the classes codehilite, Pygments and toc emit; page utility classes
+# (fixed, inset-0, ...) would let a post restyle the page around it
+PYGMENTS_CLASSES = {css_class for css_class in STANDARD_TYPES.values() if css_class} | {'hll', 'normal', 'special'}
+ALLOWED_CLASSES = {
+    'div': {'highlight', 'toc', 'linenodiv'},
+    'span': PYGMENTS_CLASSES,
+    'a': {'headerlink'},
+    'table': {'highlighttable'},
+    'td': {'linenos', 'code'},
+}
+
+
+def _filter_attribute(tag, attribute, value):
+    if attribute == 'id' and not value.startswith(TOC_ID_PREFIX):
+        return None
+    return value
+
+
+def _clean(html):
+    return nh3.clean(html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, allowed_classes=ALLOWED_CLASSES, attribute_filter=_filter_attribute)
+
+
+def render_markdown(text):
+    """Return (content_html, toc_html) for Markdown source, both sanitized"""
+    md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS, extension_configs=MARKDOWN_EXTENSION_CONFIGS)
+    html = md.convert(text)
+    toc = md.toc if md.toc_tokens else ''
+    return _clean(html), _clean(toc)
+
+
+def render_post_fields(content):
+    """
+    Compute every derived Post column from its Markdown source. This is a
+    plain function of the text so it can run in worker processes.
+    """
+    content_html, toc_html = render_markdown(content)
+    text = strip_tags(content_html).replace('¶', '')
+    words = len(text.split())
+    return {
+        'content_html': content_html,
+        'toc_html': toc_html,
+        'excerpt': Truncator(Truncator(' '.join(text.split())).words(EXCERPT_WORDS)).chars(EXCERPT_MAX_LENGTH),
+        'word_count': words,
+        'reading_minutes': max(1, math.ceil(words / WORDS_PER_MINUTE)),
+    }
+
+
+def render_post_batch(rows):
+    """Render [(pk, content)] in a worker process; returns [(pk, fields)]"""
+    return [(pk, render_post_fields(content)) for pk, content in rows]
@@ -0,0 +1,96 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+# Read replica routing
+#
+# Writes always go to the primary. Reads only go to the replica inside views
+# wrapped with replica_reads, and not for a client that wrote something in
+# the last REPLICA_STICKY_SECONDS: the replica may not have caught up, and
+# nobody should miss their own comment or edit.
+
+REPLICA_ALIAS = 'replica'
+STICKY_COOKIE = 'primary_pin'
+
+# Identity tables back request.user and are read before any view runs
+PRIMARY_ONLY_APPS = ('auth', 'sessions', 'contenttypes', 'admin')
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def pinned_to_primary(request):
+    return STICKY_COOKIE in request.COOKIES
+
+
+def replica_reads(view_func):
+    """
+    View decorator that serves the view's reads from the replica; only for
+    views that don't write (GraphQL queries are POSTs but read-only). Lazy
+    responses are rendered inside the decorator so template queries are
+    routed too.
+    """
+    @wraps(view_func)
+    def wrapped(request, *args, **kwargs):
+        request.read_only = True
+        if not replica_configured() or pinned_to_primary(request):
+            return view_func(request, *args, **kwargs)
+        token = _read_alias.set(REPLICA_ALIAS)
+        try:
+            response = view_func(request, *args, **kwargs)
+            if callable(getattr(response, 'render', None)) and not response.is_rendered:
+                response.render()
+            return response
+        finally:
+            _read_alias.reset(token)
+    return wrapped
+
+
+@contextmanager
+def primary_reads():
+    """Send the reads inside the block to the primary, e.g. to fill a shared cache"""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            return alias
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Instances read from the replica are saved to the primary, not back to where they came from
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+
+class PrimaryStickinessMiddleware:
+    """Pin a client's reads to the primary for a while after each of its writes"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        wrote = request.method not in ('GET', 'HEAD', 'OPTIONS') and not getattr(request, 'read_only', False)
+        if replica_configured() and wrote and response.status_code < 400:
+            response.set_cookie(
+                STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax', secure=request.is_secure(),
+            )
+        return response
@@ -0,0 +1,141 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import F, Max
+from django.urls import reverse
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from .caching import get_generation, write_document
+from .models import Post, Portfolio
+
+
+SITEMAP_NAMESPACE = 'sitemaps'
+SITEMAP_XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+SITEMAP_CHUNK_SIZE = 2000
+
+
+# Each section maps a model to the URL of its detail page. Shards are fixed
+# primary key ranges, so a single save or delete only ever touches one shard.
+SITEMAP_SECTIONS = {
+    'posts': {
+        'queryset': lambda: Post.objects.all(),
+        'lookup': 'pk',
+        'url_name': 'post detail',
+        'url_kwarg': 'pk',
+    },
+    'portfolio': {
+        'queryset': lambda: Portfolio.objects.filter(is_public=True),
+        'lookup': 'slug',
+        'url_name': 'portfolio detail',
+        'url_kwarg': 'slug',
+    },
+}
+
+
+def shard_for_pk(pk):
+    return (pk - 1) // settings.SITEMAP_SHARD_SIZE
+
+
+def shard_namespace(section, shard):
+    return f'{SITEMAP_NAMESPACE}:{section}:{shard}'
+
+
+def _lastmod(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%S+00:00') if value else None
+
+
+def _sitemap_dir():
+    return Path(settings.CACHE_ROOT) / SITEMAP_NAMESPACE
+
+
+def _base_url():
+    # Never the request's host: see SITE_URL
+    return settings.SITE_URL.rstrip('/')
+
+
+def write_shard(outfile, section, shard, base_url):
+    """Write the <urlset> for one shard of a section"""
+    config = SITEMAP_SECTIONS[section]
+    size = settings.SITEMAP_SHARD_SIZE
+    rows = (
+        config['queryset']()
+        .filter(pk__gt=shard * size, pk__lte=(shard + 1) * size)
+        .order_by('pk')
+        .values_list(config['lookup'], 'updated_at')
+    )
+
+    handler = SimplerXMLGenerator(outfile, 'utf-8')
+    handler.startDocument()
+    handler.startElement('urlset', {'xmlns': SITEMAP_XMLNS})
+    for lookup, updated_at in rows.iterator(chunk_size=SITEMAP_CHUNK_SIZE):
+        handler.startElement('url', {})
+        handler.addQuickElement('loc', base_url + reverse(config['url_name'], kwargs={config['url_kwarg']: lookup}))
+        handler.addQuickElement('lastmod', _lastmod(updated_at))
+        handler.endElement('url')
+    handler.endElement('urlset')
+    handler.endDocument()
+
+
+def get_shards(section):
+    """Return [(shard, lastmod)] for every non-empty shard of a section"""
+    rows = (
+        SITEMAP_SECTIONS[section]['queryset']()
+        .order_by()
+        .annotate(shard=(F('pk') - 1) / settings.SITEMAP_SHARD_SIZE)
+        .values('shard')
+        .annotate(lastmod=Max('updated_at'))
+        .order_by('shard')
+    )
+    return [(row['shard'], row['lastmod']) for row in rows]
+
+
+def shard_count(section):
+    """Number of shards up to the one holding the section's highest primary key"""
+    highest = SITEMAP_SECTIONS[section]['queryset']().aggregate(highest=Max('pk'))['highest']
+    return 0 if highest is None else shard_for_pk(highest) + 1
+
+
+def write_index(outfile, base_url):
+    """Write the <sitemapindex> listing every shard of every section"""
+    handler = SimplerXMLGenerator(outfile, 'utf-8')
+    handler.startDocument()
+    handler.startElement('sitemapindex', {'xmlns': SITEMAP_XMLNS})
+    for section in SITEMAP_SECTIONS:
+        for shard, lastmod in get_shards(section):
+            handler.startElement('sitemap', {})
+            handler.addQuickElement('loc', base_url + reverse('sitemap', kwargs={'section': section, 'shard': shard}))
+            if lastmod:
+                handler.addQuickElement('lastmod', _lastmod(lastmod))
+            handler.endElement('sitemap')
+    handler.endElement('sitemapindex')
+    handler.endDocument()
+
+
+def _get_document(name, namespace, write):
+    generation = get_generation(namespace)
+    directory = _sitemap_dir()
+    path = directory / f'{name}.{generation}.xml'
+    if path.exists():
+        return path, generation
+
+    write_document(path, write)
+    # Only this document's older generations are stale; other shards are untouched
+    for stale in directory.glob(f'{name}.*.xml'):
+        stale_generation = stale.name[len(name) + 1:-len('.xml')]
+        if stale_generation.isdigit() and int(stale_generation) < generation:
+            stale.unlink(missing_ok=True)
+    return path, generation
+
+
+def get_index_document():
+    """Return (path, generation) of the cached sitemap index"""
+    return _get_document('index', SITEMAP_NAMESPACE, lambda outfile: write_index(outfile, _base_url()))
+
+
+def get_shard_document(section, shard):
+    """Return (path, generation) of one cached sitemap shard"""
+    return _get_document(
+        f'{section}-{shard}',
+        shard_namespace(section, shard),
+        lambda outfile: write_shard(outfile, section, shard, _base_url()),
+    )
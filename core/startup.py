@@ -0,0 +1,68 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+
+
+# Boot profiling
+#
+# A worker boot is measured in a fresh interpreter, since by the time a
+# management command runs everything it would measure is already imported.
+
+# Modules that must only be imported by the code paths that use them
+LAZY_MODULES = ('PIL', 'markdown', 'nh3', 'pygments', 'graphene', 'jinja2', 'cloudscraper', 'tldextract', 'm3u8', 'tinydb', 'cryptography')
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+# What a gunicorn worker does before it serves its first request: import
+# the WSGI module (django.setup() and template warming) and the URLconf
+BOOT_CODE = '''
+import json, sys, time
+started = time.perf_counter()
+from importlib import import_module
+import_module({wsgi_module!r})
+from django.conf import settings
+import_module(settings.ROOT_URLCONF)
+elapsed = time.perf_counter() - started
+lazy = {lazy}
+print(json.dumps({{
+    "seconds": elapsed,
+    "loaded": sorted(name for name in lazy if name in sys.modules),
+}}))
+'''
+
+
+def measure_boot(importtime=False):
+    """
+    Boot the project in a fresh interpreter. Return (seconds, lazy modules
+    that got loaded, import records); records are (module, self_us,
+    cumulative_us, depth) and only collected with importtime=True.
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    wsgi_module = settings.WSGI_APPLICATION.rpartition('.')[0]
+    command += ['-c', BOOT_CODE.format(lazy=repr(LAZY_MODULES), wsgi_module=wsgi_module)]
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'cabrelblog.settings')}
+    result = subprocess.run(command, capture_output=True, text=True, cwd=settings.BASE_DIR, env=env, check=True)
+
+    summary = json.loads(result.stdout.strip().splitlines()[-1])
+    records = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return summary['seconds'], summary['loaded'], records
+
+
+def package_totals(records):
+    """Total self import time per top-level package, most expensive first"""
+    totals = defaultdict(int)
+    for module, self_us, _, _ in records:
+        totals[module.partition('.')[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,138 @@
+import fcntl
+import hashlib
+import os
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db.models import F
+from django.utils import timezone
+
+from .media import is_compressible, precompress
+
+
+# Content-addressed media
+#
+# Every upload is stored once, as blobs/<2 hex>/<sha256>.<ext>, whatever its
+# original name or field. A blob's bytes never change, so its URL can be
+# cached forever. MediaBlob rows count the model fields that reference each
+# blob (see the receivers in core.models); collect_media_garbage deletes
+# blobs nothing has referenced for MEDIA_BLOB_GRACE_HOURS.
+
+BLOB_DIR = 'blobs'
+# Uploads being written, on the same filesystem so they can be renamed into place
+INCOMING_DIR = f'{BLOB_DIR}/.incoming'
+# Held while a blob is stored or collected (see blob_lock)
+LOCK_NAME = f'{BLOB_DIR}/.lock'
+
+# Fields that store blob names, per model
+MEDIA_FIELDS = {
+    'core.Post': ('image',),
+    'core.Portfolio': ('featured_image',),
+    'core.Profile': ('image',),
+}
+
+
+def blob_name(digest, ext):
+    return f'{BLOB_DIR}/{digest[:2]}/{digest}{ext.lower()}'
+
+
+@contextmanager
+def blob_lock(storage):
+    """
+    Exclusive lock, across the host's processes, on storing or collecting
+    blobs: an upload that finds its blob already on disk must not have it
+    deleted under it by collect_media_garbage before its row is refreshed
+    """
+    path = Path(storage.path(LOCK_NAME))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that hashes an upload while writing it to a temporary
+    file, then renames it to its content-hash path, or drops it when that
+    blob already exists.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The name is only used for its extension
+        return name
+
+    def _save(self, name, content):
+        incoming = Path(self.path(INCOMING_DIR))
+        incoming.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=incoming)
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            with os.fdopen(fd, 'wb') as temp:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp.write(chunk)
+                    size += len(chunk)
+
+            name = blob_name(digest.hexdigest(), os.path.splitext(name)[1])
+            path = Path(self.path(name))
+            with blob_lock(self):
+                if path.exists():
+                    # Same bytes already stored
+                    os.unlink(temp_path)
+                else:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(temp_path, self.file_permissions_mode)
+                    os.replace(temp_path, path)
+                    if settings.MEDIA_PRECOMPRESS and is_compressible(name):
+                        precompress(path)
+                record_upload(name, size)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        return name
+
+
+# Reference counts
+
+def record_upload(name, size):
+    """Create the blob's row, or protect an existing unreferenced one from the next collection"""
+    from .models import MediaBlob
+    MediaBlob.objects.update_or_create(name=name, defaults={'size': size, 'uploaded_at': timezone.now()})
+
+
+def add_references(names):
+    from .models import MediaBlob
+    for name in filter(None, names):
+        MediaBlob.objects.filter(name=name).update(references=F('references') + 1)
+
+
+def remove_references(names):
+    from .models import MediaBlob
+    for name in filter(None, names):
+        MediaBlob.objects.filter(name=name, references__gt=0).update(references=F('references') - 1)
+
+
+def media_names(instance):
+    """The names instance's media fields hold, in MEDIA_FIELDS order ('' for empty ones)"""
+    return [getattr(instance, field).name or '' for field in MEDIA_FIELDS[instance._meta.label]]
+
+
+def count_references():
+    """Count the references to every stored name by scanning the media fields"""
+    counts = Counter()
+    for label, fields in MEDIA_FIELDS.items():
+        model = apps.get_model(label)
+        for field in fields:
+            names = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).values_list(field, flat=True)
+            counts.update(names.iterator())
+    return counts
@@ -0,0 +1,68 @@
+import json
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from core.critical_css import CRITICAL_DIR, REPORT_NAME, STYLESHEET
+
+register = template.Library()
+
+
+def _read_static(path):
+    found = finders.find(path)
+    if not found:
+        return None
+    with open(found, encoding='utf-8') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=None)
+def _cached_static(path):
+    return _read_static(path)
+
+
+def _load(path):
+    # Re-read on every render while developing so rebuilds show up immediately
+    return _read_static(path) if settings.DEBUG else _cached_static(path)
+
+
+def stylesheet_url():
+    """URL of the full stylesheet, fingerprinted even without the manifest storage"""
+    url = static(STYLESHEET)
+    if url == settings.STATIC_URL + STYLESHEET:
+        report = _load(f'{CRITICAL_DIR}/{REPORT_NAME}')
+        if report:
+            url += '?v=' + json.loads(report)['stylesheet_hash']
+    return url
+
+
+def _deferred_link(url):
+    return format_html(
+        '<link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        '  <noscript><link rel="stylesheet" href="{}"></noscript>',
+        url, url,
+    )
+
+
+@register.simple_tag
+def critical_css(page=None):
+    """
+    Inline a page's critical CSS and load the full stylesheet without blocking
+    render. Falls back to a normal <link> when there is no critical CSS.
+    """
+    url = stylesheet_url()
+    critical = _load(f'{CRITICAL_DIR}/{page}.css') if page else None
+    if critical is None:
+        return format_html('<link rel="stylesheet" href="{}">', url)
+    return format_html('<style>{}</style>\n  {}', mark_safe(critical), _deferred_link(url))
+
+
+@register.simple_tag
+def deferred_stylesheet(path):
+    """Load a stylesheet for content below the fold without blocking render"""
+    return _deferred_link(static(path))
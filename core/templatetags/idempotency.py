@@ -0,0 +1,20 @@
+from django import template
+from django.utils.html import format_html
+
+from core.idempotency import FIELD_NAME, new_key
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def idempotency_field(context):
+    """
+    Hidden idempotency key for a form. A form re-rendered after a failed
+    submission (a bound form in the context) keeps the key it was posted
+    with; a blank form gets a new one.
+    """
+    request = context.get('request')
+    form = context.get('form')
+    resubmission = request is not None and request.method == 'POST' and getattr(form, 'is_bound', True)
+    key = request.POST.get(FIELD_NAME) if resubmission else None
+    return format_html('<input type="hidden" name="{}" value="{}">', FIELD_NAME, key or new_key())
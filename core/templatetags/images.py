@@ -0,0 +1,8 @@
+from django import template
+
+from core.images import placeholder_attrs
+
+register = template.Library()
+
+# {% placeholder_attrs post 'image' %} inside an <img> tag
+register.simple_tag(placeholder_attrs)
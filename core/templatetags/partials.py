@@ -0,0 +1,27 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.templating import render_partial
+
+register = template.Library()
+
+# Template rendered by each tag (also read by core.critical_css)
+PARTIAL_TEMPLATES = {
+    'post_card': 'core/partials/post_card.html',
+}
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    """
+    A post listing card, rendered with the partials engine (see
+    JINJA2_PARTIALS). The page provides liked_post_ids and like_count on
+    each post (core.likes.like_state).
+    """
+    card_context = {
+        'post': post,
+        'user': context.get('user'),
+        'liked_by_user': post.pk in context.get('liked_post_ids', ()),
+    }
+    # Escaped by the engine that rendered it
+    return mark_safe(render_partial(PARTIAL_TEMPLATES['post_card'], card_context, context.get('request')))
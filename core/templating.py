@@ -0,0 +1,54 @@
+import logging
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.template.loader import render_to_string
+
+
+logger = logging.getLogger(__name__)
+
+# Each engine's templates in this app, relative to the app directory
+TEMPLATE_DIRS = {'django': 'templates', 'jinja2': 'jinja2'}
+
+
+def partial_engine():
+    return 'jinja2' if settings.JINJA2_PARTIALS else 'django'
+
+
+def render_partial(template_name, context, request=None):
+    """Render one of the hot partials that exist for both engines (core/jinja2/) with the configured one"""
+    return render_to_string(template_name, context, request, using=partial_engine())
+
+
+def app_templates():
+    """(engine alias, template name) for every template of this app, for each configured engine"""
+    app_path = Path(apps.get_app_config('core').path)
+    configured = {engine.name for engine in engines.all()}
+    for alias, dirname in TEMPLATE_DIRS.items():
+        root = app_path / dirname
+        if alias not in configured or not root.is_dir():
+            continue
+        for path in sorted(root.rglob('*.html')):
+            yield alias, path.relative_to(root).as_posix()
+
+
+def warm_templates():
+    """
+    Compile every template of this app into the engines' caches (the cached
+    loader, Jinja2's environment cache) so a worker's first requests don't
+    pay for parsing. Return (compiled, errors, seconds).
+    """
+    started = time.perf_counter()
+    compiled, errors = 0, []
+    for alias, name in app_templates():
+        try:
+            engines[alias].get_template(name)
+        except TemplateSyntaxError as exc:
+            logger.error('Template %s (%s) does not compile: %s', name, alias, exc)
+            errors.append((alias, name, exc))
+        else:
+            compiled += 1
+    return compiled, errors, time.perf_counter() - started
@@ -1,3 +1,543 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import multiprocessing
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .cache_backends import SQLiteCache
+from .caching import bump_generation, get_generation, get_or_compute
+from .counters import flush_views, get_trending_posts, record_view
+from .critical_css import CRITICAL_PAGES, extract_critical, page_critical_css, parse_css, read_stylesheet, serialize_css, template_classes
+from .exports import FORMULA_PREFIXES, export_chunks
+from .graphql_api.schema import schema
+from .media import precompress, serve
+from .models import Comment, ContactMessage, MediaBlob, Post, Tag
+from .ratelimit import client_identity, consume, ratelimit
+from .rendering import TOC_ID_PREFIX, render_markdown
+from .routers import STICKY_COOKIE
+from .startup import measure_boot
+from .views import AddCommentView
+
+
+# Pages render without a collectstatic manifest
+plain_static = override_settings(STORAGES={
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+
+
+@plain_static
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_repeated_contact_submission_is_stored_once(self):
+        data = {
+            'name': 'Ada', 'email': 'ada@example.com', 'subject': 'Hello',
+            'message': 'Hi there', 'idempotency_key': 'a1b2c3',
+        }
+        first = self.client.post(reverse('contact'), data)
+        second = self.client.post(reverse('contact'), data)
+        self.assertEqual(first.status_code, 302)
+        self.assertEqual(second.status_code, 302)
+        self.assertEqual(second['Location'], first['Location'])
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+    def test_invalid_submission_releases_its_key(self):
+        data = {'name': 'Ada', 'email': 'not an email', 'subject': 'Hello', 'message': 'Hi', 'idempotency_key': 'd4e5f6'}
+        self.assertEqual(self.client.post(reverse('contact'), data).status_code, 200)
+        data['email'] = 'ada@example.com'
+        self.assertEqual(self.client.post(reverse('contact'), data).status_code, 302)
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+
+class ConcurrentIdempotencyTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('ada', password='secret')
+        self.post = Post.objects.create(title='Post', content='Body', author=self.user)
+
+    def test_concurrent_duplicate_comments_write_once(self):
+        workers = 10
+        barrier = threading.Barrier(workers)
+        view = AddCommentView.as_view()
+        responses = []
+
+        def submit():
+            request = RequestFactory().post(
+                reverse('add_comment', args=[self.post.pk]),
+                {'content': 'First!', 'idempotency_key': 'f00d'},
+            )
+            request.user = self.user
+            barrier.wait()
+            try:
+                responses.append(view(request, pk=self.post.pk))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(responses), workers)
+        self.assertEqual({response.status_code for response in responses}, {302})
+        self.assertEqual(len({response['Location'] for response in responses}), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+
+
+@override_settings(RATELIMIT_ENABLE=True, RATELIMITS={'test': '2/m'})
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_previous_window_is_weighted(self):
+        start = 600 * 60
+        # 10 requests late in one window...
+        self.assertTrue(all(consume('test', 'ip:a', 10, 60, now=start + 54)[0] for _ in range(10)))
+        # ...still count for half halfway through the next, leaving room for 5
+        results = [consume('test', 'ip:a', 10, 60, now=start + 90) for _ in range(6)]
+        self.assertEqual([allowed for allowed, _ in results], [True] * 5 + [False])
+        # 7 requests fit once only 3 of the previous 10 are still covered, at 0.7 of the window
+        self.assertEqual(results[-1][1], 12)
+        self.assertTrue(consume('test', 'ip:a', 10, 60, now=start + 102)[0])
+
+    def test_exceeded_limit_answers_429_with_retry_after(self):
+        view = ratelimit('test')(lambda request: HttpResponse('ok'))
+        factory = RequestFactory()
+        self.assertEqual(view(factory.get('/')).status_code, 200)
+        statuses = [view(factory.post('/')).status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        response = view(factory.post('/'))
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        # Another client has its own budget
+        self.assertEqual(view(factory.post('/', REMOTE_ADDR='203.0.113.9')).status_code, 200)
+
+    def test_identity_ignores_client_supplied_forwarded_entries(self):
+        factory = RequestFactory()
+        request = factory.post('/', HTTP_X_FORWARDED_FOR='198.51.100.1, 203.0.113.7', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(client_identity(request), 'ip:10.0.0.1')
+        with self.settings(RATELIMIT_TRUST_X_FORWARDED_FOR=True):
+            self.assertEqual(client_identity(request), 'ip:203.0.113.7')
+            with self.settings(RATELIMIT_TRUSTED_PROXIES=2):
+                self.assertEqual(client_identity(request), 'ip:198.51.100.1')
+            with self.settings(RATELIMIT_TRUSTED_PROXIES=3):
+                self.assertEqual(client_identity(request), 'ip:10.0.0.1')
+            request.user = User(pk=5)
+            self.assertEqual(client_identity(request), 'user:5')
+
+
+# The test runner gives each alias its own database (settings.py adds a
+# replica when testing), so the replica stays empty unless something writes to it
+@plain_static
+class ReplicaRoutingTests(TransactionTestCase):
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('ada', password='secret')
+        self.post = Post.objects.create(title='Only on the primary', content='Body', author=self.user)
+
+    def test_reads_use_the_replica_until_a_write(self):
+        self.assertFalse(Post.objects.using('replica').exists())
+        self.assertEqual(self.client.get(reverse('post detail', args=[self.post.pk])).status_code, 404)
+        # Shared listing caches are only ever filled from the primary
+        self.assertContains(self.client.get(reverse('all posts')), 'Only on the primary')
+
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('add_comment', args=[self.post.pk]), {'content': 'Nice'})
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        self.assertTrue(Comment.objects.using('default').exists())
+        self.assertFalse(Comment.objects.using('replica').exists())
+
+        # Read your own writes
+        self.assertContains(self.client.get(reverse('all posts')), 'Only on the primary')
+        self.assertContains(self.client.get(reverse('post detail', args=[self.post.pk])), 'Nice')
+        self.assertEqual(flush_views(), 1)
+
+
+@override_settings(VIEW_COUNT_FLUSH_THRESHOLD=5)
+class ViewCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        flush_views()
+        user = User.objects.create_user('ada')
+        self.quiet, self.popular, self.unseen = (
+            Post.objects.create(title=title, content='Body', author=user) for title in ('Quiet', 'Popular', 'Unseen')
+        )
+
+    def view_counts(self):
+        return dict(Post.objects.values_list('title', 'view_count'))
+
+    def test_views_are_buffered_until_the_threshold(self):
+        record_view(self.quiet.pk)
+        for _ in range(3):
+            record_view(self.popular.pk)
+        self.assertEqual(self.view_counts(), {'Quiet': 0, 'Popular': 0, 'Unseen': 0})
+
+        record_view(self.popular.pk)
+        self.assertEqual(self.view_counts(), {'Quiet': 1, 'Popular': 4, 'Unseen': 0})
+        self.assertEqual(get_trending_posts(), [self.popular, self.quiet])
+
+    def test_later_views_outrank_older_ones(self):
+        for _ in range(5):
+            record_view(self.popular.pk)
+        for _ in range(3):
+            record_view(self.quiet.pk)
+        self.assertEqual(flush_views(now=time.time() + 3 * settings.TRENDING_HALF_LIFE_HOURS * 60 * 60), 3)
+        self.assertEqual(get_trending_posts(), [self.quiet, self.popular])
+
+
+class GraphQLBatchingTests(TestCase):
+    query = """
+        { posts(first: 20) {
+            title
+            author { username profile { bio } }
+            tags { name }
+            commentCount
+            comments { content }
+        } }
+    """
+
+    def test_nested_post_query_is_batched(self):
+        tags = [Tag.objects.create(name=f'tag{i}') for i in range(3)]
+        authors = [User.objects.create_user(f'author{i}') for i in range(5)]
+        for i in range(20):
+            post = Post.objects.create(title=f'Post {i}', content='Body', author=authors[i % 5])
+            post.tags.set(tags[:i % 4])
+            Comment.objects.create(post=post, author=authors[0], content='Nice')
+
+        # posts, authors with profiles, tags, comment counts, comments: one query each
+        with self.assertNumQueries(5):
+            result = schema.execute(self.query, context_value=RequestFactory().get('/'))
+        self.assertIsNone(result.errors)
+        self.assertEqual(len(result.data['posts']), 20)
+
+
+class CacheStampedeTests(SimpleTestCase):
+    workers = 100
+
+    def setUp(self):
+        cache.clear()
+        self.computed = 0
+        self.lock = threading.Lock()
+
+    def compute(self):
+        with self.lock:
+            self.computed += 1
+            value = self.computed
+        time.sleep(0.2)  # long enough for every worker to miss
+        return value
+
+    def run_concurrently(self):
+        barrier = threading.Barrier(self.workers)
+        results = []
+
+        def read():
+            barrier.wait()
+            results.append(get_or_compute('stampede-test', self.compute, timeout=60, namespace='stampede-test'))
+
+        threads = [threading.Thread(target=read) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_misses_compute_once(self):
+        results = self.run_concurrently()
+        self.assertEqual(self.computed, 1)
+        self.assertEqual(results, [1] * self.workers)
+
+    def test_invalidation_serves_stale_while_one_request_recomputes(self):
+        self.run_concurrently()
+        bump_generation('stampede-test')
+        results = self.run_concurrently()
+        self.assertEqual(self.computed, 2)
+        # Only the request that recomputed waited for the new value
+        self.assertEqual(sorted(results), [1] * (self.workers - 1) + [2])
+
+
+def _bump_in_child(queue):
+    queue.put(bump_generation('shared-test'))
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.location = str(Path(self.dir.name) / 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {})
+
+    def test_add_replaces_only_expired_rows(self):
+        self.cache.set('live', 'old', 60)
+        self.assertFalse(self.cache.add('live', 'new'))
+        self.assertEqual(self.cache.get('live'), 'old')
+        self.cache.set('expired', 'old', 0)
+        self.assertTrue(self.cache.add('expired', 'new'))
+        self.assertEqual(self.cache.get('expired'), 'new')
+
+    def test_incr_needs_a_live_integer(self):
+        self.cache.set('count', 1, 60)
+        self.assertEqual(self.cache.incr('count', 5), 6)
+        self.assertEqual(self.cache.get('count'), 6)
+        self.cache.set('text', 'one', 60)
+        self.cache.set('expired', 1, 0)
+        for key in ('text', 'expired', 'missing'):
+            with self.assertRaises(ValueError):
+                self.cache.incr(key)
+
+    def test_touch_moves_expiry_of_live_rows_only(self):
+        self.cache.set('key', 'value', 60)
+        self.assertTrue(self.cache.touch('key', 0))
+        self.assertIsNone(self.cache.get('key'))
+        self.assertFalse(self.cache.touch('key', 60))
+        self.assertFalse(self.cache.touch('missing', 60))
+
+    def test_cull_drops_expired_then_soonest_to_expire(self):
+        cache = SQLiteCache(self.location, {'OPTIONS': {'MAX_ENTRIES': 4, 'CULL_FREQUENCY': 2}})
+        cache.set('expired', 1, 0)
+        cache.set_many({f'soon-{i}': i for i in range(4)}, 60)
+        cache.set('forever', 1, None)
+        with mock.patch('core.cache_backends.CULL_EVERY', 1):
+            cache.set('late', 1, 3600)
+        self.assertFalse(cache.has_key('expired'))
+        self.assertEqual(len(cache.get_many([f'soon-{i}' for i in range(4)])), 1)
+        self.assertTrue(cache.has_key('forever'))
+        self.assertTrue(cache.has_key('late'))
+
+    def test_locked_database_fails_counters_but_not_reads(self):
+        self.cache.set('count', 1, 60)
+        with mock.patch('core.cache_backends.BUSY_TIMEOUT', 0.1):
+            cache = SQLiteCache(self.location, {})
+            writer = sqlite3.connect(self.location, isolation_level=None)
+            writer.execute('BEGIN IMMEDIATE')
+            try:
+                self.assertEqual(cache.get('count'), 1)
+                cache.set('other', 1)
+                with self.assertRaises(sqlite3.OperationalError):
+                    cache.incr('count')
+                with self.assertRaises(sqlite3.OperationalError):
+                    cache.add('lock', 1)
+            finally:
+                writer.rollback()
+                writer.close()
+
+    def test_generation_is_shared_across_processes(self):
+        caches = {'default': {'BACKEND': 'core.cache_backends.SQLiteCache', 'LOCATION': self.location}}
+        with self.settings(CACHES=caches):
+            before = get_generation('shared-test')
+            queue = multiprocessing.get_context('fork').Queue()
+            child = multiprocessing.get_context('fork').Process(target=_bump_in_child, args=(queue,))
+            child.start()
+            bumped = queue.get(timeout=10)
+            child.join()
+            self.assertEqual(bumped, before + 1)
+            self.assertEqual(get_generation('shared-test'), bumped)
+
+
+PIXEL_GIF = (
+    b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00'
+    b',\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;'
+)
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.user = User.objects.create_user('ada', password='secret')
+
+    def create_post(self, filename):
+        post = Post(title='Post', content='Body', author=self.user)
+        post.image.save(filename, ContentFile(PIXEL_GIF), save=False)
+        post.save()
+        return post
+
+    def test_identical_uploads_share_one_counted_blob(self):
+        first = self.create_post('pixel.gif')
+        second = self.create_post('copy.gif')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(default_storage.exists(first.image.name))
+        self.assertEqual(MediaBlob.objects.get().references, 2)
+
+        second.delete()
+        first.image = None
+        first.save()
+        self.assertEqual(MediaBlob.objects.get().references, 0)
+
+
+class MediaServeTests(SimpleTestCase):
+    body = b'<svg xmlns="http://www.w3.org/2000/svg">' + b'<rect width="1" height="1"/>' * 40 + b'</svg>'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = self.settings(MEDIA_ROOT=directory.name, MEDIA_ACCEL_REDIRECT='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        path = Path(directory.name) / 'icon.svg'
+        path.write_bytes(self.body)
+        precompress(path)
+
+    def get(self, **headers):
+        response = serve(RequestFactory().get('/media/icon.svg', **headers), 'icon.svg')
+        self.addCleanup(response.close)
+        return response
+
+    def content(self, response):
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def test_conditional_get(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+    def test_byte_ranges(self):
+        size = len(self.body)
+        response = self.get(HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{size}')
+        self.assertEqual(self.content(response), self.body[10:20])
+        self.assertEqual(self.content(self.get(HTTP_RANGE='bytes=-5')), self.body[-5:])
+
+        response = self.get(HTTP_RANGE=f'bytes={size}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{size}')
+
+        # Invalid ranges are ignored, not rejected
+        for header in ('bytes=5-3', 'bytes=0-1,4-5', 'items=0-1'):
+            response = self.get(HTTP_RANGE=header)
+            self.assertEqual(response.status_code, 200, header)
+            self.assertEqual(self.content(response), self.body)
+
+    def test_if_range(self):
+        etag = self.get()['ETag']
+        self.assertEqual(self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag).status_code, 206)
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.content(response), self.body)
+
+    def test_precompressed_variant(self):
+        response = self.get(HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(self.content(response)), self.body)
+        self.assertNotEqual(response['ETag'], self.get()['ETag'])
+
+        plain = self.get()
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(self.content(plain), self.body)
+        # Ranges always address the identity bytes
+        ranged = self.get(HTTP_ACCEPT_ENCODING='gzip', HTTP_RANGE='bytes=0-9')
+        self.assertFalse(ranged.has_header('Content-Encoding'))
+        self.assertEqual(self.content(ranged), self.body[:10])
+
+
+class ExportTests(TestCase):
+    fields = ['id', 'name', 'message', 'status']
+
+    def setUp(self):
+        self.messages = [
+            ContactMessage.objects.create(name=f'{prefix}cmd', email='x@example.com', subject='Hi', message=f'{prefix}1+1', status='spam')
+            for prefix in FORMULA_PREFIXES
+        ]
+        self.plain = ContactMessage.objects.create(name='Ada', email='ada@example.com', subject='Hi', message='Hello, "world"')
+
+    def export(self, **kwargs):
+        return b''.join(export_chunks(ContactMessage.objects.all(), self.fields, **kwargs))
+
+    def test_csv_escapes_formula_cells(self):
+        rows = list(csv.reader(io.StringIO(self.export(fmt='csv').decode('utf-8'), newline='')))
+        self.assertEqual(rows[0], self.fields)
+        for row, prefix in zip(rows[1:], FORMULA_PREFIXES):
+            self.assertEqual(row[1:], [f"'{prefix}cmd", f"'{prefix}1+1", 'spam'])
+        self.assertEqual(rows[-1], [str(self.plain.pk), 'Ada', 'Hello, "world"', 'new'])
+
+    def test_jsonl_keeps_values_as_they_are(self):
+        lines = [json.loads(line) for line in self.export(fmt='jsonl').decode('utf-8').splitlines()]
+        self.assertEqual([line['name'] for line in lines], [f'{prefix}cmd' for prefix in FORMULA_PREFIXES] + ['Ada'])
+
+    def test_gzip_stream_decompresses_to_the_plain_export(self):
+        queryset = ContactMessage.objects.all()
+        with mock.patch('core.exports.BUFFER_SIZE', 16):
+            plain = list(export_chunks(queryset, self.fields, chunk_size=2))
+            compressed = b''.join(export_chunks(queryset, self.fields, compress=True, chunk_size=2))
+        self.assertGreater(len(plain), 1)
+        self.assertEqual(gzip.decompress(compressed), b''.join(plain))
+
+    def test_export_data_filters_by_status(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'spam.csv.gz'
+            call_command('export_data', 'contact', '--status', 'spam', '--gzip', '-o', str(path), stdout=io.StringIO())
+            rows = list(csv.reader(io.StringIO(gzip.decompress(path.read_bytes()).decode('utf-8'), newline='')))
+        self.assertEqual(len(rows), len(FORMULA_PREFIXES) + 1)
+        status = rows[0].index('status')
+        self.assertEqual({row[status] for row in rows[1:]}, {'spam'})
+
+
+class MarkdownSanitizingTests(SimpleTestCase):
+    def test_raw_html_cannot_claim_page_ids_or_classes(self):
+        html, _ = render_markdown(
+            '<div id="comment-count-1" class="fixed inset-0 z-50 bg-white">Gotcha</div>\n\n'
+            '<span id="post-detail-body" class="hidden">x</span>'
+        )
+        self.assertIn('Gotcha', html)
+        self.assertNotIn('id=', html)
+        for css_class in ('fixed', 'inset-0', 'z-50', 'hidden'):
+            self.assertNotIn(css_class, html)
+
+    def test_generated_ids_and_classes_survive(self):
+        html, toc = render_markdown('[TOC]\n\n## Setup\n\n```python\nx = 1\n```')
+        self.assertIn(f'<h2 id="{TOC_ID_PREFIX}setup">', html)
+        self.assertIn('class="headerlink"', html)
+        self.assertIn('<div class="highlight">', html)
+        self.assertIn('<span class="n">x</span>', html)
+        self.assertIn(f'href="#{TOC_ID_PREFIX}setup"', toc)
+
+
+class CriticalCssTests(SimpleTestCase):
+    def test_partial_tags_are_scanned(self):
+        card = template_classes('core/partials/post_card.html')
+        self.assertTrue(card)
+        self.assertLessEqual(card, template_classes('core/post_list.html'))
+
+    def test_footer_is_below_the_fold(self):
+        self.assertNotIn('text-gray-300', template_classes('base.html'))
+
+    def test_interaction_states_are_left_out(self):
+        nodes = parse_css('@layer components{.btn{color:red;&:hover{color:blue}}.btn:focus{color:green}}')
+        self.assertEqual(serialize_css(extract_critical(nodes, {'btn'})), '@layer components{.btn{color:red;}}')
+
+    def test_pages_stay_within_budget(self):
+        nodes = parse_css(read_stylesheet().decode('utf-8'))
+        for page, template_name in CRITICAL_PAGES.items():
+            size = len(gzip.compress(page_critical_css(nodes, template_name), mtime=0))
+            self.assertLessEqual(size, settings.CRITICAL_CSS_BUDGET_BYTES, page)
+
+
+class StartupTests(SimpleTestCase):
+    def test_boot_stays_within_budget(self):
+        seconds, loaded, _ = measure_boot()
+        self.assertEqual(loaded, [], 'Heavy modules imported at boot instead of where they are used')
+        self.assertLessEqual(seconds * 1000, settings.BOOT_TIME_BUDGET_MS)
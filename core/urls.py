@@ -31,6 +31,18 @@ urlpatterns = [
     # Contact page
     path('contact/', views.ContactView.as_view(), name='contact'),
 
+    # Feeds
+    path('feeds/<str:fmt>/', views.PostFeedView.as_view(), name='post feed'),
+    path('feeds/<str:fmt>/tag/<int:pk>/', views.TagFeedView.as_view(), name='tag feed'),
+    path('feeds/<str:fmt>/author/<int:pk>/', views.AuthorFeedView.as_view(), name='author feed'),
+
+    # Sitemaps
+    path('sitemap.xml', views.SitemapIndexView.as_view(), name='sitemap index'),
+    path('sitemap-<str:section>-<int:shard>.xml', views.SitemapView.as_view(), name='sitemap'),
+
+    # GraphQL API
+    path('graphql/', views.graphql, name='graphql'),
+
     # Portfolio section
      path('portfolio/<slug:slug>/', views.PortfolioDetailView.as_view(), name='portfolio detail'),
 
@@ -3,6 +3,8 @@ from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.views.decorators.csrf import csrf_exempt
 
 from django.conf import settings
 from django.urls import reverse_lazy
@@ -10,10 +12,23 @@ from django.contrib import messages
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import CreateView, ListView, DeleteView, DetailView, UpdateView, View, TemplateView
-from django.http import HttpResponse
+from django.http import HttpResponse, FileResponse, Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.contrib.auth.models import User
 from .forms import PostForm, CommentForm, ContactForm, UserUpdateForm, ProfileUpdateForm
 from .models import Post, Like, Service, Portfolio, Profile
+from .feeds import FEED_FORMATS, get_feed_document
+from .sitemaps import SITEMAP_SECTIONS, get_index_document, get_shard_document, shard_count
+from .ratelimit import ratelimit
+from .idempotency import idempotent
+from .likes import like_state, set_like_counts
+from .caching import get_or_compute
+from .counters import get_trending_posts, record_view
+from .profiles import get_profile_data, profile_users
+from .fragments import fragment_response, services_html, wants_fragment
+from .routers import pinned_to_primary, replica_reads
+from .templating import render_partial
 
 
 
@@ -25,16 +40,15 @@ class ProfileView(LoginRequiredMixin, DetailView):
     context_object_name = 'profile_user'
     
     def get_object(self):
-        return self.request.user
+        user = profile_users().get(pk=self.request.user.pk)
+        # Make sure user has a profile
+        if getattr(user, 'profile', None) is None:
+            user.profile = Profile.objects.create(user=user)
+        return user
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Make sure user has a profile
-        Profile.objects.get_or_create(user=self.request.user)
-        
-        # Get all posts by this user, ordered by creation date (newest first)
-        context['user_posts'] = Post.objects.filter(author=self.request.user).order_by('-created_at')
-        
+        context.update(get_profile_data(self.object))
         return context
 
 # class ProfileView(LoginRequiredMixin, TemplateView):
@@ -86,10 +100,12 @@ class ProfileDetailView(DetailView):
     template_name = 'core/profile_detail.html'
     context_object_name = 'profile_user'
 
+    def get_queryset(self):
+        return profile_users()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Add related posts
-        context['posts'] = self.object.post_set.all()
+        context.update(get_profile_data(self.object))
         return context
 
 
@@ -128,17 +144,38 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
         
         
 
+# Cached listings and aggregates, recomputed by one request at a time after
+# the signals in models.py bump these namespaces
+POSTS_NAMESPACE = 'posts'
+PORTFOLIO_NAMESPACE = 'portfolio'
+
+
+def cached_listing(request, key, compute):
+    """
+    A post listing from the cache; computed directly for a client that just
+    wrote something, which must see its own write
+    """
+    if pinned_to_primary(request):
+        return compute()
+    return get_or_compute(key, compute, settings.LISTING_CACHE_TIMEOUT, POSTS_NAMESPACE)
+
+
 # Home view
+@method_decorator(replica_reads, name='dispatch')
 class HomeView(TemplateView):
     template_name = 'core/home.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['recent_posts'] = Post.objects.order_by('-created_at')[:3]  # Show top 3 posts
+        context['recent_posts'] = cached_listing(
+            self.request, 'posts:recent', lambda: list(Post.objects.for_cards().order_by('-created_at')[:3]),  # Show top 3 posts
+        )
+        context['trending_posts'] = get_trending_posts()
         return context
 
 
 # Signup view
+@method_decorator(ratelimit('register'), name='dispatch')
 class UserResgisterView(CreateView):
     model = User
     form_class = UserCreationForm
@@ -148,6 +185,7 @@ class UserResgisterView(CreateView):
 
 
 
+@method_decorator(idempotent('post'), name='dispatch')
 class PostCreateView(LoginRequiredMixin, CreateView):
     model = Post
     form_class = PostForm  # or fields = ['title', 'content', 'image', ...]
@@ -160,29 +198,46 @@ class PostCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
     
 # view for listing all posts
+@method_decorator(replica_reads, name='dispatch')
 class PostListView(ListView):
     model = Post
+    queryset = Post.objects.for_cards()  # cards never show the post body
     template_name = 'core/post_list.html'
     context_object_name = 'posts'
     ordering = ['-created_at'] # Newest first
 
+    def get_queryset(self):
+        return cached_listing(self.request, 'posts:cards', lambda: list(super(PostListView, self).get_queryset()))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Like counts and the user's likes for every card in two queries
+        context['liked_post_ids'] = like_state(self.request.user, context['posts'])
+        return context
+
+
+
+def liked_by(user, post):
+    """Prepare post for its like button; return whether user liked it"""
+    return post.pk in like_state(user, [post])
 
 
 # View post details
+@method_decorator(replica_reads, name='dispatch')
 class PostDetailView(DetailView):
     model = Post
     template_name = 'core/post_detail.html'
     context_object_name = 'post'
 
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        record_view(self.object.pk)
+        return response
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        post = self.get_object()
         context['form'] = CommentForm()
-        user = self.request.user
-        liked_by_user = False
-        if user.is_authenticated:
-            liked_by_user = post.likes.filter(user=user).exists()
-        context['liked_by_user'] = liked_by_user
+        context['liked_by_user'] = liked_by(self.request.user, self.object)
         return context
 
 # View for editing Posts
@@ -217,9 +272,11 @@ class PostEditSubmitView(LoginRequiredMixin, UserPassesTestMixin, View):
         post = get_object_or_404(Post, pk=pk)
         form = PostForm(request.POST, request.FILES, instance=post)
         if form.is_valid():
-            form.save()
-            # Return updated detail HTML to replace the form
-            return render(request, 'core/post_detail.html', {'post': post})
+            post = form.save()
+            if not wants_fragment(request):
+                return redirect('post detail', pk=pk)
+            # Only the post body replaces the form; comments and the page around it are untouched
+            return fragment_response(request, 'core/partials/post_body.html', {'post': post, 'liked_by_user': liked_by(request.user, post)})
         else:
             # Return form again with errors
             return render(request, 'core/partials/post_edit_form.html', {'form': form, 'post': post})
@@ -242,17 +299,24 @@ class PostDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return self.request.user == post.author
     
 # View for handling likes
+@method_decorator(ratelimit('like'), name='dispatch')
 class ToggleLikeView(LoginRequiredMixin, View):
     def post(self, request, pk):
         post = get_object_or_404(Post, pk=pk)
         like, created = Like.objects.get_or_create(user=request.user, post=post)
         if not created:
             like.delete()  # unlike
-        html = render_to_string('core/partials/like_button.html', {'post': post, 'user': request.user})
+        if not wants_fragment(request):
+            return redirect('post detail', pk=pk)
+        # The like button carries its own counter
+        set_like_counts([post])
+        html = render_partial('core/partials/like_button.html', {'post': post, 'user': request.user, 'liked_by_user': created}, request)
         return HttpResponse(html)
     
 
 @method_decorator(login_required, name='dispatch')
+@method_decorator(idempotent('comment'), name='dispatch')
+@method_decorator(ratelimit('comment'), name='dispatch')
 class AddCommentView(View):
     def post(self, request, pk):
         post = get_object_or_404(Post, pk=pk)
@@ -262,7 +326,14 @@ class AddCommentView(View):
             comment.author = request.user
             comment.post = post
             comment.save()
+            if wants_fragment(request):
+                # The new comment is appended to the list; the count and a blank form (with a new idempotency key) swap out of band
+                context = {'post': post, 'comment': comment, 'comment_count': post.comments.count(), 'form': CommentForm()}
+                oob = ['core/partials/comment_count.html', 'core/partials/comment_form.html']
+                return fragment_response(request, 'core/partials/comment.html', context, oob, status=201)
             return redirect('post detail', pk=pk)
+        if wants_fragment(request):
+            return render(request, 'core/partials/comment_form.html', {'post': post, 'form': form})
         context = {
             'post': post,
             'form': form,
@@ -270,15 +341,36 @@ class AddCommentView(View):
         return render(request, 'core/post_detail.html', context)
 
 
-class ServicesPageView(ListView):
-    model = Service
+class ServicesPageView(TemplateView):
     template_name = 'core/services.html'
-    context_object_name = 'services'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Prebuilt HTML; only rendered again after a Service changes
+        context['services_html'] = mark_safe(services_html())
+        return context
 
 
-# About page view with portfolio items
 
+# About page view with portfolio items
+def portfolio_summary():
+    public = Portfolio.objects.filter(is_public=True)
+    technologies = set()
+    for value in public.values_list('technologies', flat=True):
+        technologies.update(tech.strip() for tech in value.split(',') if tech.strip())
+    return {
+        'portfolio_stats': {
+            'total_projects': public.count(),
+            'completed_projects': public.filter(status='completed').count(),
+            'in_progress_projects': public.filter(status='in_progress').count(),
+            'technologies_used': len(technologies),
+        },
+        'available_types': list(public.values_list('portfolio_type', flat=True).distinct()),
+        'available_statuses': list(public.values_list('status', flat=True).distinct()),
+    }
+
+
+@method_decorator(replica_reads, name='dispatch')
 class AboutView(TemplateView):
     """About page view with portfolio items"""
     template_name = 'core/about.html'
@@ -302,24 +394,13 @@ class AboutView(TemplateView):
         # Get featured items
         featured_items = portfolio_items.filter(is_featured=True)
         
-        # Get portfolio statistics
-        portfolio_stats = {
-            'total_projects': Portfolio.objects.filter(is_public=True).count(),
-            'completed_projects': Portfolio.objects.filter(is_public=True, status='completed').count(),
-            'in_progress_projects': Portfolio.objects.filter(is_public=True, status='in_progress').count(),
-            'technologies_used': len(set([tech.strip() for item in Portfolio.objects.filter(is_public=True) for tech in item.get_technologies_list()])),
-        }
-        
-        # Get unique portfolio types and statuses for filters
-        available_types = Portfolio.objects.filter(is_public=True).values_list('portfolio_type', flat=True).distinct()
-        available_statuses = Portfolio.objects.filter(is_public=True).values_list('status', flat=True).distinct()
-        
+        # Portfolio statistics and the filter options don't depend on the filters
+        summary = get_or_compute('about:portfolio_summary', portfolio_summary, settings.ABOUT_STATS_TIMEOUT, PORTFOLIO_NAMESPACE)
+
         context.update({
             'portfolio_items': portfolio_items,
             'featured_items': featured_items,
-            'portfolio_stats': portfolio_stats,
-            'available_types': available_types,
-            'available_statuses': available_statuses,
+            **summary,
             'current_type_filter': portfolio_type,
             'current_status_filter': status,
             'portfolio_type_choices': Portfolio.PORTFOLIO_TYPES,
@@ -355,6 +436,8 @@ class PortfolioDetailView(DetailView):
 
 
 # Contact View
+@method_decorator(idempotent('contact'), name='dispatch')
+@method_decorator(ratelimit('contact'), name='dispatch')
 class ContactView(TemplateView):
     """Contact page with form handling"""
     template_name = 'core/contact.html'
@@ -391,9 +474,10 @@ class ContactView(TemplateView):
             # Save the message
             contact_message = form.save()
             
-            # Send notification email (optional)
+            # Send notification email (optional), but not for spam
             try:
-                self.send_notification_email(contact_message)
+                if not contact_message.is_spam:
+                    self.send_notification_email(contact_message)
             except Exception as e:
                 print(f"Failed to send email notification: {e}")
             
@@ -442,4 +526,74 @@ class ContactView(TemplateView):
             from_email=settings.DEFAULT_FROM_EMAIL,
             recipient_list=[settings.ADMIN_EMAIL],  # Add ADMIN_EMAIL to your settings
             fail_silently=False,
-        )
\ No newline at end of file
+        )
+
+
+
+# Cached documents (feeds, sitemaps)
+def cached_document_response(request, path, etag, content_type, max_age):
+    """Stream a generated document from disk, honouring conditional request headers"""
+    last_modified = int(path.stat().st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        # FileResponse streams the document from disk in blocks
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+        response['Last-Modified'] = http_date(last_modified)
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+# Syndication feeds
+class PostFeedView(View):
+    """RSS/Atom/JSON feed of posts, served from the cached feed document"""
+    scope = 'all'
+
+    def get(self, request, fmt, pk=None):
+        if fmt not in FEED_FORMATS:
+            raise Http404('Unknown feed format')
+
+        path, generation = get_feed_document(fmt, self.scope, pk)
+        etag = f'"{fmt}-{self.scope}-{pk or 0}-{generation}"'
+        return cached_document_response(request, path, etag, FEED_FORMATS[fmt].content_type, settings.FEED_MAX_AGE)
+
+
+class TagFeedView(PostFeedView):
+    scope = 'tag'
+
+
+class AuthorFeedView(PostFeedView):
+    scope = 'author'
+
+
+# Sitemaps
+class SitemapIndexView(View):
+    """Sitemap index listing every shard of every section"""
+
+    def get(self, request):
+        path, generation = get_index_document()
+        return cached_document_response(request, path, f'"sitemap-index-{generation}"', 'application/xml', settings.SITEMAP_MAX_AGE)
+
+
+class SitemapView(View):
+    """One shard of up to SITEMAP_SHARD_SIZE detail page URLs"""
+
+    def get(self, request, section, shard):
+        if section not in SITEMAP_SECTIONS:
+            raise Http404('Unknown sitemap section')
+        # Checked before anything is written, so made-up shard numbers cost no disk
+        if shard >= shard_count(section):
+            raise Http404('No such sitemap shard')
+
+        path, generation = get_shard_document(section, shard)
+        etag = f'"sitemap-{section}-{shard}-{generation}"'
+        return cached_document_response(request, path, etag, 'application/xml', settings.SITEMAP_MAX_AGE)
+
+
+# GraphQL API
+@csrf_exempt
+@replica_reads
+def graphql(request):
+    # graphene is imported by the first GraphQL request rather than at worker boot
+    from .graphql_api.views import graphql_view
+    return graphql_view(request)
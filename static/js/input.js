@@ -35,6 +35,7 @@
   function swapFromHTML(responseHTML, selector, targetElement) {
     const parser = new DOMParser();
     const doc = parser.parseFromString(responseHTML, 'text/html');
+    applyOutOfBand(doc);
     const replacement = doc.querySelector(selector);
     if (replacement && targetElement) {
       targetElement.replaceWith(replacement);
@@ -43,6 +44,16 @@
     return false;
   }
 
+  // --- Out-of-band swaps: elements marked hx-swap-oob replace the element with their id ---
+  function applyOutOfBand(doc) {
+    doc.querySelectorAll('[hx-swap-oob]').forEach(function (el) {
+      el.remove();
+      el.removeAttribute('hx-swap-oob');
+      const current = el.id && document.getElementById(el.id);
+      if (current) current.replaceWith(el);
+    });
+  }
+
   // --- Like button (replaces HTMX on core/partials/like_button.html) ---
   function onLikeSubmit(e) {
     const form = e.target.closest('form.js-like-form');
@@ -61,6 +72,7 @@
         if (wrapper) {
           const parser = new DOMParser();
           const doc = parser.parseFromString(html, 'text/html');
+          applyOutOfBand(doc);
           const updated = doc.body.firstElementChild || doc.querySelector('[id^="like-button-"]');
           if (updated) wrapper.replaceWith(updated);
         }
@@ -93,6 +105,34 @@
       .catch(err => console.error('Inline edit submit failed:', err));
   }
 
+  // --- Comment form: append the new comment, swap the count and a fresh form out of band ---
+  function onCommentSubmit(e) {
+    const form = e.target.closest('form.js-comment-form');
+    if (!form) return;
+    e.preventDefault();
+
+    const action = form.getAttribute('action');
+    const formData = new FormData(form);
+    const list = document.querySelector(form.dataset.commentList);
+    const wrapper = form.closest('[id^="comment-form-"]');
+
+    fetch(action, fetchOptions('POST', formData, true))
+      .then(res => res.text().then(html => [res.status, html]))
+      .then(([status, html]) => {
+        const parser = new DOMParser();
+        const doc = parser.parseFromString(html, 'text/html');
+        applyOutOfBand(doc);
+        if (status === 201 && list) {
+          list.querySelectorAll('.js-comments-empty').forEach(el => el.remove());
+          Array.from(doc.body.children).forEach(el => list.appendChild(el));
+        } else if (wrapper && doc.body.firstElementChild) {
+          // The form again, with its errors
+          wrapper.replaceWith(doc.body.firstElementChild);
+        }
+      })
+      .catch(err => console.error('Comment submit failed:', err));
+  }
+
   // --- Inline edit loader (GET the partial and swap it) ---
   function onInlineEditTrigger(e) {
     const btn = e.target.closest('.js-inline-edit-trigger');
@@ -123,6 +163,8 @@
       onLikeSubmit(e);
     } else if (e.target && e.target.classList.contains('js-inline-edit-form')) {
       onInlineEditSubmit(e);
+    } else if (e.target && e.target.classList.contains('js-comment-form')) {
+      onCommentSubmit(e);
     }
   });
 